@@ -1,7 +1,11 @@
+import argparse
 import glob
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
-from lachesis import Lachesis, LachesisMultiInstance
+from lachesis import LachesisMultiInstance, LachesisPipeline, Profiler, merge_profiles
+from render import Renderer
 
 
 def create_dir(path):
@@ -11,51 +15,265 @@ def create_dir(path):
         pass
 
 
-def automate_lachesis(
-    input_dir, output_dir, create_graph=False, create_graph_multi=False
+def graph_name_of(input_filename):
+    base_filename = os.path.basename(input_filename)
+    return os.path.splitext(base_filename)[0].split("_", 1)[1]
+
+
+def graph_files(input_dir):
+    # a graph converted to the binary format is run from its .ldag file, which
+    # loads faster than the .txt file it was converted from
+    files = {}
+    for extension in (".txt", ".ldag"):
+        for input_filename in glob.glob(os.path.join(input_dir, f"graph_*{extension}")):
+            files[os.path.splitext(input_filename)[0]] = input_filename
+    return list(files.values())
+
+
+def run_graph(
+    input_filename,
+    output_dir,
+    create_graph=False,
+    create_graph_multi=False,
+    renderer=None,
+    profile=False,
 ):
-    input_graphs_directory = os.path.join(input_dir, "graph_*.txt")
-    file_list = glob.glob(input_graphs_directory)
+    try:
+        graph_dir = os.path.join(
+            output_dir, f"graph_{graph_name_of(input_filename)}_results"
+        )
+        if create_graph or create_graph_multi:
+            create_dir(graph_dir)
 
-    print(f"processing {len(file_list)} files...")
+        output_filename = os.path.join(graph_dir, "result.pdf")
+
+        reference_profiler = Profiler() if profile else None
+        multi_instance_profiler = Profiler() if profile else None
+
+        pipeline = LachesisPipeline(input_filename, reference_profiler)
+        pipeline.reference_run(
+            output_filename, create_graph, renderer, key=input_filename
+        )
+
+        lachesis_multi_instance = LachesisMultiInstance(
+            graph_results=create_graph_multi, profiler=multi_instance_profiler
+        )
+        pipeline.run_multi_instance(
+            lachesis_multi_instance,
+            graph_dir,
+            create_graph_multi,
+            renderer,
+            key=input_filename,
+        )
+
+        if profile:
+            return None, {
+                "reference": reference_profiler.summary(),
+                "multi_instance": multi_instance_profiler.summary(),
+            }
+        return None, None
+
+    except Exception as e:
+        return str(e), None
+
+
+def run_graphs(
+    file_list,
+    output_dir,
+    create_graph=False,
+    create_graph_multi=False,
+    profile=False,
+    on_record=None,
+):
+    # graphs are drawn in a background process while the next file runs
+    renderer = Renderer() if create_graph or create_graph_multi else None
+    records = {}
+    for input_filename in file_list:
+        records[input_filename] = run_graph(
+            input_filename,
+            output_dir,
+            create_graph,
+            create_graph_multi,
+            renderer,
+            profile,
+        )
+        if on_record is not None:
+            on_record()
+    if renderer is not None:
+        renderer.close()
+        # graphs that failed to draw count as failed runs of their file
+        for input_filename, error in renderer.errors.items():
+            run_error, report = records[input_filename]
+            records[input_filename] = (run_error or error, report)
+    return list(records.items())
 
-    success_count = 0
 
-    for _, input_filename in tqdm(
-        enumerate(file_list), total=len(file_list), desc="processing files"
+def balanced_chunks(file_list, workers, chunksize=None):
+    # the largest graphs go out first so that no worker is left with a big one
+    # at the end, and without a fixed chunksize every chunk takes a share of
+    # the graphs that are left, so the chunks get smaller towards the end
+    file_list = sorted(file_list, key=lambda f: (-os.path.getsize(f), f))
+    chunks = []
+    start = 0
+    while start < len(file_list):
+        size = chunksize or max(1, (len(file_list) - start) // (workers * 2))
+        chunks.append(file_list[start : start + size])
+        start += size
+    return chunks
+
+
+def print_profile(title, summary):
+    print(f"\n{title}:")
+    total = sum(totals["seconds"] for totals in summary["phases"].values())
+    for phase, totals in sorted(
+        summary["phases"].items(), key=lambda item: -item[1]["seconds"]
     ):
-        try:
-            base_filename = os.path.basename(input_filename)
-            graph_name = base_filename[
-                base_filename.index("_") + 1 : base_filename.index(".txt")
-            ]
+        share = totals["seconds"] / total * 100 if total else 0
+        print(
+            f"  {phase:>30}: {totals['seconds']:9.3f}s {share:5.1f}% "
+            f"{totals['calls']:>10} calls"
+        )
+    for counter, amount in sorted(summary["counters"].items()):
+        print(f"  {counter:>30}: {amount:>10}")
+    for histogram, counts in sorted(summary["histograms"].items()):
+        calls = sum(counts.values())
+        total = sum(value * count for value, count in counts.items())
+        print(
+            f"  {histogram:>30}: {total / calls:10.1f} mean "
+            f"{max(counts):>10} max per call"
+        )
 
-            graph_dir = os.path.join(output_dir, f"graph_{graph_name}_results")
-            if create_graph or create_graph_multi:
-                create_dir(graph_dir)
 
-            output_filename = os.path.join(graph_dir, "result.pdf")
+def write_profile(reports, output_dir):
+    # per-graph summaries and their totals over the corpus
+    profile = {
+        "graphs": {
+            graph_name_of(input_filename): report
+            for input_filename, report in sorted(reports.items())
+        },
+        "total": {
+            run: merge_profiles(report[run] for report in reports.values())
+            for run in ("reference", "multi_instance")
+        },
+    }
 
-            lachesis_state = Lachesis()
-            lachesis_state.run_lachesis(input_filename, output_filename, create_graph)
+    create_dir(output_dir)
+    with open(os.path.join(output_dir, "profile.json"), "w") as file:
+        json.dump(profile, file, indent=2)
 
-            lachesis_multi_instance = LachesisMultiInstance(
-                graph_results=create_graph_multi
-            )
-            lachesis_multi_instance.run_lachesis_multiinstance(
-                input_filename, graph_dir
+    print_profile("single instance phases", profile["total"]["reference"])
+    print_profile("multi-instance phases", profile["total"]["multi_instance"])
+    return profile
+
+
+def automate_lachesis(
+    input_dir,
+    output_dir,
+    create_graph=False,
+    create_graph_multi=False,
+    workers=1,
+    chunksize=None,
+    profile=False,
+):
+    file_list = graph_files(input_dir)
+
+    print(f"processing {len(file_list)} files...")
+
+    records = {}
+
+    with tqdm(total=len(file_list), desc="processing files") as progress:
+        if workers <= 1:
+            records.update(
+                run_graphs(
+                    file_list,
+                    output_dir,
+                    create_graph,
+                    create_graph_multi,
+                    profile,
+                    on_record=progress.update,
+                )
             )
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(
+                        run_graphs,
+                        chunk,
+                        output_dir,
+                        create_graph,
+                        create_graph_multi,
+                        profile,
+                    )
+                    for chunk in balanced_chunks(file_list, workers, chunksize)
+                ]
+                for future in as_completed(futures):
+                    chunk_records = future.result()
+                    records.update(chunk_records)
+                    progress.update(len(chunk_records))
 
+    reports = {
+        input_filename: report
+        for input_filename, (_, report) in records.items()
+        if report is not None
+    }
+    records = sorted(
+        (input_filename, error) for input_filename, (error, _) in records.items()
+    )
+    success_count = 0
+    for input_filename, error in records:
+        if error is None:
             success_count += 1
+        else:
+            print("error in", graph_name_of(input_filename), error)
 
-        except Exception as e:
-            print("error in", graph_name, str(e))
-
-    success_rate = success_count / len(file_list) * 100
+    success_rate = success_count / len(file_list) * 100 if file_list else 0
     print(f"success rate: {success_rate:.1f}%")
 
+    if reports:
+        write_profile(reports, output_dir)
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run Lachesis on every graph in /tests/graphs and /tests/cheaters"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes to run graphs on (default: 1, in-process)",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="graphs handed to a worker at a time (default: decreasing chunk sizes)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time the phases of every run and write profile.json to the results",
+    )
+    args = parser.parse_args()
 
-print("\nautomating graphs without cheaters...\n\n")
-automate_lachesis("../tests/graphs", "../tests/results", True, False)
-print("\n\nautomating graphs with cheaters...\n\n")
-automate_lachesis("../tests/cheaters", "../tests/cheaters_results", True, False)
+    print("\nautomating graphs without cheaters...\n\n")
+    automate_lachesis(
+        "../tests/graphs",
+        "../tests/results",
+        True,
+        False,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        profile=args.profile,
+    )
+    print("\n\nautomating graphs with cheaters...\n\n")
+    automate_lachesis(
+        "../tests/cheaters",
+        "../tests/cheaters_results",
+        True,
+        False,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        profile=args.profile,
+    )
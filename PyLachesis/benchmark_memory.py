@@ -0,0 +1,165 @@
+import argparse
+import glob
+import os
+import sys
+import tracemalloc
+import numpy as np
+from lachesis import Lachesis, LachesisMultiInstance, test_bits
+
+
+class LegacyEvent:
+    # the original dict-backed Event layout, kept as the baseline for comparison
+    def __init__(self, event, lachesis):
+        validators = lachesis.validator_ids.keys
+        self.validator = event.validator
+        self.timestamp = event.timestamp
+        self.original_sequence = event.original_sequence
+        self.sequence = event.sequence
+        self.weight = event.weight
+        self.uuid = copy_string(event.uuid)
+        self.frame = event.frame
+        self.root = event.root
+        self.atropos = event.atropos
+        self.highest_observed = observations(event, lachesis.highest_observed, lachesis)
+        self.lowest_observing = observations(event, lachesis.lowest_observing, lachesis)
+        self.parents = [copy_string(parent_uuid) for parent_uuid in event.parents]
+        self.visited = {
+            validators[validator_id]: {
+                "uuid": copy_string(event.uuid),
+                "sequence": event.sequence,
+            }
+            for validator_id in np.flatnonzero(
+                test_bits(
+                    lachesis.validator_visited_events[: len(validators)], event.index
+                )
+            )
+        }
+        self.last_event = event.last_event
+        self.direct_parents = set(event.direct_parents)
+
+
+def observations(event, vector_clocks, lachesis):
+    validators = lachesis.validator_ids.keys
+    sequences = vector_clocks.sequences[event.index, : len(validators)]
+    indices = vector_clocks.indices[event.index, : len(validators)]
+    return {
+        validators[validator_id]: {
+            "uuid": copy_string(lachesis.events[indices[validator_id]].uuid),
+            "sequence": int(sequences[validator_id]),
+        }
+        for validator_id in np.flatnonzero(sequences)
+    }
+
+
+def copy_string(string):
+    # the original parser produced a separate string for every UUID reference
+    return "".join(list(string))
+
+
+def deep_size(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(
+            deep_size(getattr(obj, slot), seen)
+            for slot in obj.__slots__
+            if hasattr(obj, slot)
+        )
+    return size
+
+
+def vector_clock_size(lachesis):
+    return (
+        lachesis.highest_observed.sequences.nbytes
+        + lachesis.highest_observed.indices.nbytes
+        + lachesis.lowest_observing.sequences.nbytes
+        + lachesis.lowest_observing.indices.nbytes
+        + lachesis.validator_visited_events.nbytes
+        + lachesis.event_timestamps.nbytes
+    )
+
+
+def event_memory(instances):
+    legacy = 0
+    current = 0
+    events = 0
+    # event cores and parent lists are shared between instances, so count them once
+    shared = set()
+    for lachesis in instances:
+        legacy += deep_size([LegacyEvent(event, lachesis) for event in lachesis.events])
+        current += deep_size(lachesis.events, shared) + vector_clock_size(lachesis)
+        events += len(lachesis.events)
+    return events, legacy, current
+
+
+def traced_peak(run):
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def benchmark_memory(file_list, multi_instance=False):
+    totals = [0, 0, 0]
+    peak = 0
+
+    for input_filename in file_list:
+        if multi_instance:
+            lachesis_multi_instance = LachesisMultiInstance()
+            lachesis_multi_instance.file_path = input_filename
+            peak = max(peak, traced_peak(lachesis_multi_instance.process))
+            instances = lachesis_multi_instance.instances.values()
+        else:
+            lachesis_state = Lachesis()
+            peak = max(
+                peak,
+                traced_peak(
+                    lambda: lachesis_state.run_lachesis(input_filename, None, False)
+                ),
+            )
+            instances = [lachesis_state]
+
+        for i, value in enumerate(event_memory(instances)):
+            totals[i] += value
+
+    events, legacy, current = totals
+    mode = "multi-instance" if multi_instance else "single instance"
+    print(f"{mode}: {events} events in {len(file_list)} files")
+    print(f"    legacy events: {legacy / 2**20:8.2f} MiB, {legacy / events:6.0f} B/event")
+    print(f"   current events: {current / 2**20:8.2f} MiB, {current / events:6.0f} B/event")
+    print(f"        reduction: {legacy / current:.2f}x")
+    print(f"  peak traced run: {peak / 2**20:8.2f} MiB")
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the memory used by the Event representation"
+    )
+    parser.add_argument(
+        "input_files",
+        nargs="*",
+        default=sorted(glob.glob(os.path.join("../tests/graphs", "graph_*.txt")))[:20],
+        help="DAG files to run (defaults to the first 20 files in /tests/graphs)",
+    )
+    parser.add_argument(
+        "--multi",
+        action="store_true",
+        help="also measure every instance of a LachesisMultiInstance run",
+    )
+    args = parser.parse_args()
+
+    benchmark_memory(args.input_files)
+    if args.multi:
+        benchmark_memory(args.input_files, multi_instance=True)
@@ -0,0 +1,101 @@
+import argparse
+import glob
+import os
+import re
+import time
+from lachesis import Event, parse_data
+
+
+def parse_data_legacy(file_path):
+    # the original line-by-line parser, kept as the baseline for comparison
+    event_list = []
+
+    with open(file_path, "r") as file:
+        for line in file:
+            unique_id_match = re.search(r"unique_id:\s([a-z0-9-]*)", line)
+            label_match = re.search(
+                r"label:\s\(([\w\s]+),(\d+),(\d+),(\d+),(True|False)\)", line
+            )
+            if not (unique_id_match and label_match):
+                continue
+
+            unique_id = unique_id_match.group(1)
+            validator, timestamp, sequence, weight, last_event = label_match.groups()
+
+            event = Event(
+                validator,
+                int(timestamp),
+                int(sequence),
+                int(weight),
+                unique_id,
+                last_event == "True",
+            )
+
+            event_list.append(event)
+
+            child_unique_ids = re.findall(r"child_unique_id:\s([a-z0-9-]*)", line)
+            for child_unique_id in child_unique_ids:
+                event.add_parent(child_unique_id)
+
+    return event_list
+
+
+def same_events(events_a, events_b):
+    return len(events_a) == len(events_b) and all(
+        a == b and a.parents == b.parents for a, b in zip(events_a, events_b)
+    )
+
+
+def time_parser(parser, file_list, repeat):
+    best = None
+    events = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        events = sum(len(parser(file_path)) for file_path in file_list)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, events
+
+
+def benchmark_parse(input_dirs, limit=None, repeat=3):
+    file_list = []
+    for input_dir in input_dirs:
+        file_list.extend(sorted(glob.glob(os.path.join(input_dir, "graph_*.txt"))))
+    if limit is not None:
+        file_list = file_list[:limit]
+
+    total_bytes = sum(os.path.getsize(file_path) for file_path in file_list)
+
+    for file_path in file_list:
+        assert same_events(
+            parse_data(file_path), parse_data_legacy(file_path)
+        ), f"parse_data disagrees with the legacy parser on {file_path}"
+
+    print(f"parsing {len(file_list)} files ({total_bytes / 2**20:.1f} MiB)...")
+
+    results = {}
+    for name, parser in (("legacy", parse_data_legacy), ("parse_data", parse_data)):
+        elapsed, events = time_parser(parser, file_list, repeat)
+        results[name] = elapsed
+        print(
+            f"{name:>10}: {elapsed:.3f}s, {events / elapsed:,.0f} events/s, "
+            f"{total_bytes / 2**20 / elapsed:.1f} MiB/s"
+        )
+
+    print(f"speedup: {results['legacy'] / results['parse_data']:.2f}x")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark DAG parsing throughput")
+    parser.add_argument(
+        "input_dirs",
+        nargs="*",
+        default=["../tests/graphs", "../tests/cheaters"],
+        help="directories containing graph_*.txt files",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="maximum files")
+    parser.add_argument("--repeat", type=int, default=3, help="timing repetitions")
+    args = parser.parse_args()
+
+    benchmark_parse(args.input_dirs, args.limit, args.repeat)
@@ -0,0 +1,418 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from tqdm import tqdm
+from lachesis import (
+    Lachesis,
+    LachesisMultiInstance,
+    LachesisPipeline,
+    Profiler,
+)
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests")
+)
+from generate_dag import generate_events, write_binary
+
+quick_grid = {
+    "validators": [4, 16, 64],
+    "levels": [10, 100, 1000],
+    "present_probabilities": [0.8],
+    "observing_probabilities": [0.3],
+    "cheater_probabilities": [0.0, 0.1],
+}
+full_grid = {
+    "validators": [4, 10, 25, 100, 250, 1000],
+    "levels": [10, 100, 1000, 10000, 100000],
+    "present_probabilities": [0.8],
+    "observing_probabilities": [0.1, 0.3, 0.6],
+    "cheater_probabilities": [0.0, 0.05, 0.2],
+}
+
+
+# the neighbors of a validator are the validators whose Events it may observe,
+# left at the default of generate_dag.py rather than added to the grid
+neighbor_probability = 0.5
+
+
+def case_seed(
+    seed,
+    num_validators,
+    num_levels,
+    present_probability,
+    observing_probability,
+    cheater_probability,
+):
+    # every case draws from its own generator, derived as in graph_seed of
+    # tests/graph.py
+    key = (
+        f"{seed}-{num_validators}-{num_levels}-{present_probability}-"
+        f"{observing_probability}-{cheater_probability}"
+    )
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big")
+
+
+def synthetic_dag(
+    num_validators,
+    num_levels,
+    present_probability,
+    observing_probability,
+    cheater_probability,
+    seed=0,
+):
+    rng = np.random.default_rng(
+        case_seed(
+            seed,
+            num_validators,
+            num_levels,
+            present_probability,
+            observing_probability,
+            cheater_probability,
+        )
+    )
+    return generate_events(
+        rng,
+        cheater_probability,
+        num_levels,
+        num_validators,
+        present_probability,
+        observing_probability,
+        neighbor_probability,
+    )
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_case(file_path, multi_instance, profile=False, prune_horizon=None):
+    # runs in a fresh process, so that the peak RSS belongs to this run alone
+    baseline_rss = peak_rss()
+    profiler = Profiler() if profile else None
+
+    start = time.perf_counter()
+    pipeline = LachesisPipeline(file_path)
+    parse_time = time.perf_counter() - start
+
+    if multi_instance:
+        lachesis_multi_instance = LachesisMultiInstance(
+            profiler=profiler, prune_horizon=prune_horizon
+        )
+        start = time.perf_counter()
+        lachesis_multi_instance.process(pipeline)
+        process_time = time.perf_counter() - start
+        instances = lachesis_multi_instance.instances.values()
+        result = {
+            "instances": len(instances),
+            "instance_events": sum(len(i.events) for i in instances),
+            "blocks": min(i.block for i in instances),
+        }
+    else:
+        lachesis_state = Lachesis(profiler=profiler, prune_horizon=prune_horizon)
+        start = time.perf_counter()
+        lachesis_state.initialize_validators(
+            pipeline.validators, pipeline.validator_weights
+        )
+        initialize_time = time.perf_counter() - start
+        event_list = pipeline.events()
+        start = time.perf_counter()
+        lachesis_state.process_events(event_list)
+        process_time = time.perf_counter() - start
+        result = {
+            "initialize_seconds": initialize_time,
+            "blocks": lachesis_state.block,
+            "frames": lachesis_state.frame,
+            "suspected_cheaters": len(lachesis_state.suspected_cheaters),
+            "kept_events": len(lachesis_state.events),
+        }
+
+    num_events = len(pipeline.parsed_events)
+    result.update(
+        {
+            "parse_seconds": parse_time,
+            "seconds": process_time,
+            "events_per_second": num_events / process_time if process_time else None,
+            "baseline_rss": baseline_rss,
+            "peak_rss": peak_rss(),
+        }
+    )
+    if profile:
+        result["profile"] = profiler.summary()
+    return result
+
+
+def run_isolated(file_path, multi_instance, profile=False, prune_horizon=None):
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as executor:
+        return executor.submit(
+            run_case, file_path, multi_instance, profile, prune_horizon
+        ).result()
+
+
+def grid_cases(grid):
+    return [
+        dict(
+            zip(
+                (
+                    "num_validators",
+                    "num_levels",
+                    "present_probability",
+                    "observing_probability",
+                    "cheater_probability",
+                ),
+                values,
+            )
+        )
+        for values in itertools.product(
+            grid["validators"],
+            grid["levels"],
+            grid["present_probabilities"],
+            grid["observing_probabilities"],
+            grid["cheater_probabilities"],
+        )
+    ]
+
+
+def benchmark_case(
+    case,
+    seed,
+    max_events,
+    max_multi_events,
+    work_dir,
+    profile=False,
+    prune_horizon=None,
+):
+    result = dict(case, seed=seed)
+    expected_events = (
+        case["num_validators"] * case["num_levels"] * case["present_probability"]
+    )
+    if expected_events > max_events:
+        result["skipped"] = f"about {expected_events:.0f} events > {max_events}"
+        return result
+
+    start = time.perf_counter()
+    dag = synthetic_dag(**case, seed=seed)
+    generate_time = time.perf_counter() - start
+
+    file_path = os.path.join(work_dir, "dag.ldag")
+    start = time.perf_counter()
+    write_binary(dag, file_path)
+    write_time = time.perf_counter() - start
+
+    result["events"] = len(dag["timestamp"])
+    result["edges"] = len(dag["parent_indices"])
+    result["generate_seconds"] = generate_time
+    result["write_seconds"] = write_time
+    del dag
+
+    result["single_instance"] = run_isolated(file_path, False, profile, prune_horizon)
+
+    # every validator keeps its own copy of the DAG in the multi-instance run
+    instance_events = result["events"] * case["num_validators"]
+    if instance_events > max_multi_events:
+        result["multi_instance"] = {
+            "skipped": f"{instance_events} instance events > {max_multi_events}"
+        }
+    else:
+        result["multi_instance"] = run_isolated(
+            file_path, True, profile, prune_horizon
+        )
+
+    os.remove(file_path)
+    return result
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(result):
+    return (
+        result["num_validators"],
+        result["num_levels"],
+        result["present_probability"],
+        result["observing_probability"],
+        result["cheater_probability"],
+        result["seed"],
+    )
+
+
+def case_summary(result):
+    if "skipped" in result:
+        return f"skipped ({result['skipped']})"
+    summary = f"{result['events']} events"
+    for mode in ("single_instance", "multi_instance"):
+        run = result[mode]
+        if "skipped" in run:
+            summary += f", {mode}: skipped"
+        else:
+            summary += (
+                f", {mode}: {run['seconds']:.2f}s "
+                f"{run['events_per_second']:,.0f} events/s "
+                f"{run['peak_rss'] / 2**20:.0f} MiB"
+            )
+    return summary
+
+
+def compare_results(baseline, results):
+    baseline_cases = {case_key(case): case for case in baseline["cases"]}
+    print(f"against {baseline['commit']} ({baseline['started']}):")
+    for case in results["cases"]:
+        old_case = baseline_cases.get(case_key(case))
+        if old_case is None or "skipped" in case or "skipped" in old_case:
+            continue
+        ratios = []
+        for mode in ("single_instance", "multi_instance"):
+            new, old = case[mode], old_case[mode]
+            if "skipped" in new or "skipped" in old:
+                continue
+            ratios.append(
+                f"{mode} {new['events_per_second'] / old['events_per_second']:.2f}x"
+            )
+        print(
+            f"  {case['num_validators']:>5} validators {case['num_levels']:>6} levels "
+            f"o={case['observing_probability']} c={case['cheater_probability']}: "
+            + ", ".join(ratios)
+        )
+
+
+def benchmark_scaling(
+    grid,
+    output_file,
+    seed=0,
+    max_events=200000,
+    max_multi_events=2000000,
+    profile=False,
+    prune_horizon=None,
+):
+    results = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "max_events": max_events,
+        "max_multi_events": max_multi_events,
+        "profile": profile,
+        "prune_horizon": prune_horizon,
+        "grid": grid,
+        "cases": [],
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for case in tqdm(grid_cases(grid), desc="benchmarking"):
+            result = benchmark_case(
+                case,
+                seed,
+                max_events,
+                max_multi_events,
+                work_dir,
+                profile,
+                prune_horizon,
+            )
+            results["cases"].append(result)
+            tqdm.write(
+                f"{case['num_validators']:>5} validators {case['num_levels']:>6} "
+                f"levels o={case['observing_probability']} "
+                f"c={case['cheater_probability']}: {case_summary(result)}"
+            )
+            # written after every case so that an interrupted run keeps its results
+            with open(output_file, "w") as file:
+                json.dump(results, file, indent=2)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time Lachesis on synthetic DAGs across a grid of sizes"
+    )
+    parser.add_argument(
+        "--output", default="benchmark_scaling.json", help="JSON file for the results"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="use the full grid (4 to 1000 validators, 10 to 100000 levels)",
+    )
+    parser.add_argument("--validators", type=int, nargs="+", help="validator counts")
+    parser.add_argument("--levels", type=int, nargs="+", help="DAG depths")
+    parser.add_argument(
+        "--present", type=float, nargs="+", help="probabilities of emitting an event"
+    )
+    parser.add_argument(
+        "--observing", type=float, nargs="+", help="observing probabilities"
+    )
+    parser.add_argument("--cheaters", type=float, nargs="+", help="cheater rates")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the DAGs")
+    parser.add_argument(
+        "--max-events",
+        type=int,
+        default=200000,
+        help="skip DAGs expected to have more events than this",
+    )
+    parser.add_argument(
+        "--max-multi-events",
+        type=int,
+        default=2000000,
+        help="skip multi-instance runs above this many events times validators",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="also record the time spent in each phase of process_events",
+    )
+    parser.add_argument(
+        "--prune-horizon",
+        type=int,
+        default=None,
+        help="prune the history this many frames behind the frame to decide",
+    )
+    parser.add_argument(
+        "--compare", default=None, help="a previous results file to compare against"
+    )
+    args = parser.parse_args()
+
+    grid = dict(full_grid if args.full else quick_grid)
+    for key, values in (
+        ("validators", args.validators),
+        ("levels", args.levels),
+        ("present_probabilities", args.present),
+        ("observing_probabilities", args.observing),
+        ("cheater_probabilities", args.cheaters),
+    ):
+        if values:
+            grid[key] = values
+
+    results = benchmark_scaling(
+        grid,
+        args.output,
+        args.seed,
+        args.max_events,
+        args.max_multi_events,
+        args.profile,
+        args.prune_horizon,
+    )
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare_results(json.load(file), results)
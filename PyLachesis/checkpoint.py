@@ -0,0 +1,202 @@
+import struct
+import numpy as np
+
+# Binary checkpoint layout (all integers little-endian, arrays 8-byte aligned):
+#
+#   header      magic, version, flags, number of arrays, state length
+#   state       tagged encoding of the plain Python state (see pack_value)
+#   arrays      for each array: u16 length-prefixed name, u8 length-prefixed
+#               numpy dtype string, u8 number of dimensions, u64 shape of each
+#               dimension, then the raw array data
+#
+# The state only holds None, booleans, integers, floats, strings, tuples, lists,
+# dictionaries and sets. Strings are written once and referred back to by their
+# position in the order they were first written, so repeated validators and
+# UUIDs cost a varint each.
+MAGIC = b"LCKP"
+FORMAT_VERSION = 4
+HEADER = struct.Struct("<4sHHIQ")
+ALIGNMENT = 8
+
+_f64 = struct.Struct("<d")
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buffer, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = buffer[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def pack_value(value, out, strings):
+    if value is None:
+        out += b"N"
+    elif value is True or value is False or isinstance(value, np.bool_):
+        out += b"T" if value else b"F"
+    elif isinstance(value, (int, np.integer)):
+        value = int(value)
+        out += b"i"
+        # zigzag, so that small negative numbers stay small
+        _write_varint(out, 2 * value if value >= 0 else -2 * value - 1)
+    elif isinstance(value, (float, np.floating)):
+        out += b"f" + _f64.pack(value)
+    elif isinstance(value, str):
+        if value in strings:
+            out += b"r"
+            _write_varint(out, strings[value])
+        else:
+            strings[value] = len(strings)
+            encoded = value.encode("utf-8")
+            out += b"s"
+            _write_varint(out, len(encoded))
+            out += encoded
+    elif isinstance(value, dict):
+        out += b"d"
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            pack_value(key, out, strings)
+            pack_value(item, out, strings)
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        if isinstance(value, tuple):
+            out += b"t"
+        elif isinstance(value, list):
+            out += b"l"
+        else:
+            out += b"e"
+        _write_varint(out, len(value))
+        for item in value:
+            pack_value(item, out, strings)
+    else:
+        raise TypeError(f"cannot write {type(value).__name__} to a checkpoint")
+
+
+def unpack_value(buffer, offset, strings):
+    tag = buffer[offset]
+    offset += 1
+    if tag == ord("N"):
+        return None, offset
+    if tag == ord("T"):
+        return True, offset
+    if tag == ord("F"):
+        return False, offset
+    if tag == ord("i"):
+        value, offset = _read_varint(buffer, offset)
+        return (value >> 1) ^ -(value & 1), offset
+    if tag == ord("f"):
+        return _f64.unpack_from(buffer, offset)[0], offset + _f64.size
+    if tag == ord("s"):
+        length, offset = _read_varint(buffer, offset)
+        value = bytes(buffer[offset : offset + length]).decode("utf-8")
+        strings.append(value)
+        return value, offset + length
+    if tag == ord("r"):
+        position, offset = _read_varint(buffer, offset)
+        return strings[position], offset
+
+    length, offset = _read_varint(buffer, offset)
+    if tag == ord("d"):
+        value = {}
+        for _ in range(length):
+            key, offset = unpack_value(buffer, offset, strings)
+            value[key], offset = unpack_value(buffer, offset, strings)
+        return value, offset
+    items = []
+    for _ in range(length):
+        item, offset = unpack_value(buffer, offset, strings)
+        items.append(item)
+    if tag == ord("t"):
+        return tuple(items), offset
+    if tag == ord("l"):
+        return items, offset
+    if tag == ord("e"):
+        return set(items), offset
+    raise ValueError(f"unknown checkpoint tag {chr(tag)!r}")
+
+
+def write_checkpoint(file_path, state, arrays):
+    state_bytes = bytearray()
+    pack_value(state, state_bytes, {})
+
+    with open(file_path, "wb") as file:
+        file.write(
+            HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(arrays), len(state_bytes))
+        )
+        file.write(state_bytes)
+        offset = HEADER.size + len(state_bytes)
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            name = name.encode("utf-8")
+            dtype = array.dtype.str.encode("ascii")
+            entry = (
+                struct.pack("<H", len(name))
+                + name
+                + struct.pack("<B", len(dtype))
+                + dtype
+                + struct.pack(f"<B{array.ndim}Q", array.ndim, *array.shape)
+            )
+            entry += b"\0" * _padding(offset + len(entry))
+            file.write(entry)
+            file.write(array.tobytes())
+            offset += len(entry) + array.nbytes
+
+
+def read_checkpoint(file_path):
+    # the arrays are views of one writable buffer, so they can be used as they are
+    with open(file_path, "rb") as file:
+        buffer = bytearray(file.read())
+
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"{file_path} is not a Lachesis checkpoint")
+    magic, version, _, num_arrays, state_length = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{file_path} is not a Lachesis checkpoint")
+    if version != FORMAT_VERSION:
+        raise ValueError(
+            f"{file_path} has checkpoint format version {version}, "
+            f"expected {FORMAT_VERSION}"
+        )
+
+    state, offset = unpack_value(memoryview(buffer), HEADER.size, [])
+    if offset != HEADER.size + state_length:
+        raise ValueError(f"{file_path} has a corrupt checkpoint state")
+
+    arrays = {}
+    for _ in range(num_arrays):
+        (length,) = struct.unpack_from("<H", buffer, offset)
+        offset += 2
+        name = bytes(buffer[offset : offset + length]).decode("utf-8")
+        offset += length
+        (length,) = struct.unpack_from("<B", buffer, offset)
+        offset += 1
+        dtype = np.dtype(bytes(buffer[offset : offset + length]).decode("ascii"))
+        offset += length
+        (ndim,) = struct.unpack_from("<B", buffer, offset)
+        shape = struct.unpack_from(f"<{ndim}Q", buffer, offset + 1)
+        offset += 1 + 8 * ndim
+        offset += _padding(offset)
+        count = int(np.prod(shape))
+        if count:
+            arrays[name] = np.frombuffer(
+                buffer, dtype=dtype, count=count, offset=offset
+            ).reshape(shape)
+        else:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        offset += count * dtype.itemsize
+
+    return state, arrays
@@ -0,0 +1,69 @@
+import argparse
+import glob
+import os
+from tqdm import tqdm
+from dag_format import write_binary_dag
+from lachesis import parse_binary_data, parse_data
+
+BINARY_EXTENSION = ".ldag"
+
+
+def convert_graph(input_filename, output_filename, verify=False):
+    event_list = parse_data(input_filename)
+    write_binary_dag(event_list, output_filename)
+
+    if verify:
+        converted = parse_binary_data(output_filename)
+        assert len(converted) == len(event_list) and all(
+            a == b and a.parents == b.parents for a, b in zip(event_list, converted)
+        ), f"{output_filename} does not round-trip {input_filename}"
+
+    return len(event_list)
+
+
+def convert_graphs(input_dir, output_dir=None, verify=False):
+    output_dir = input_dir if output_dir is None else output_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    file_list = sorted(glob.glob(os.path.join(input_dir, "graph_*.txt")))
+    input_bytes = 0
+    output_bytes = 0
+
+    for input_filename in tqdm(file_list, desc=f"converting {input_dir}"):
+        base_filename = os.path.splitext(os.path.basename(input_filename))[0]
+        output_filename = os.path.join(output_dir, base_filename + BINARY_EXTENSION)
+        convert_graph(input_filename, output_filename, verify)
+        input_bytes += os.path.getsize(input_filename)
+        output_bytes += os.path.getsize(output_filename)
+
+    if file_list:
+        print(
+            f"converted {len(file_list)} files: {input_bytes / 2**20:.1f} MiB -> "
+            f"{output_bytes / 2**20:.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert graph_*.txt DAGs to the binary DAG format"
+    )
+    parser.add_argument(
+        "input_dirs",
+        nargs="*",
+        default=["../tests/graphs", "../tests/cheaters"],
+        help="directories containing graph_*.txt files",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="directory for the converted files (defaults to each input directory)",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="reload every converted file and compare it against the text file",
+    )
+    args = parser.parse_args()
+
+    for input_dir in args.input_dirs:
+        convert_graphs(input_dir, args.output_dir, args.verify)
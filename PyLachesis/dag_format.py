@@ -0,0 +1,232 @@
+import mmap
+import struct
+import numpy as np
+
+# Binary DAG container layout (all integers little-endian, sections 8-byte aligned):
+#
+#   header            magic, version, flags, validator/event/edge counts
+#   validator table   u16 length-prefixed UTF-8 validator names
+#   event columns     validator id, timestamp, sequence, weight (u32 each),
+#                     last_event (u8) and the raw 16-byte UUID of every event
+#   parent adjacency  CSR offsets (u32, num_events + 1) and parent event ids (u32)
+#
+# Event ids are the positions of the events in the file, so the parents of event i
+# are parent_indices[parent_offsets[i] : parent_offsets[i + 1]].
+MAGIC = b"LDAG"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIII")
+ALIGNMENT = 8
+
+_u32 = np.dtype("<u4")
+_uuid_digit_columns = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def _uuid_bytes(unique_id):
+    raw = bytes.fromhex(unique_id.replace("-", ""))
+    if len(raw) != 16 or _uuid_string(raw.hex()) != unique_id:
+        raise ValueError(f"{unique_id!r} is not a canonical UUID string")
+    return raw
+
+
+def _uuid_string(hex_digits):
+    return (
+        f"{hex_digits[:8]}-{hex_digits[8:12]}-{hex_digits[12:16]}-"
+        f"{hex_digits[16:20]}-{hex_digits[20:32]}"
+    )
+
+
+def pack_uuids(unique_ids):
+    return b"".join(_uuid_bytes(unique_id) for unique_id in unique_ids)
+
+
+def unpack_uuids(uuid_column):
+    # format every UUID at once by scattering the hex digits around the hyphens
+    num_uuids = len(uuid_column)
+    hex_digits = np.frombuffer(uuid_column.tobytes().hex().encode("ascii"), np.uint8)
+    text = np.full((num_uuids, 36), ord("-"), dtype=np.uint8)
+    text[:, _uuid_digit_columns] = hex_digits.reshape(num_uuids, 32)
+    text = text.tobytes().decode("ascii")
+    return [text[i : i + 36] for i in range(0, len(text), 36)]
+
+
+def is_binary_dag(file_path):
+    with open(file_path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def write_binary_dag(events, file_path):
+    validator_ids = {}
+    event_ids = {event.uuid: i for i, event in enumerate(events)}
+
+    validator_column = np.empty(len(events), dtype=_u32)
+    timestamp_column = np.empty(len(events), dtype=_u32)
+    sequence_column = np.empty(len(events), dtype=_u32)
+    weight_column = np.empty(len(events), dtype=_u32)
+    last_event_column = np.empty(len(events), dtype=np.uint8)
+    uuid_column = bytearray()
+    parent_offsets = np.zeros(len(events) + 1, dtype=_u32)
+    parent_indices = []
+
+    for i, event in enumerate(events):
+        validator_column[i] = validator_ids.setdefault(
+            event.validator, len(validator_ids)
+        )
+        timestamp_column[i] = event.timestamp
+        sequence_column[i] = event.sequence
+        weight_column[i] = event.weight
+        last_event_column[i] = event.last_event
+        uuid_column += _uuid_bytes(event.uuid)
+        for parent_uuid in event.parents:
+            if parent_uuid not in event_ids:
+                raise ValueError(
+                    f"parent {parent_uuid} of event {event.uuid} is not in the DAG"
+                )
+            parent_indices.append(event_ids[parent_uuid])
+        parent_offsets[i + 1] = len(parent_indices)
+
+    write_binary_columns(
+        file_path,
+        list(validator_ids),
+        validator_column,
+        timestamp_column,
+        sequence_column,
+        weight_column,
+        last_event_column,
+        bytes(uuid_column),
+        parent_offsets,
+        parent_indices,
+    )
+
+
+def write_binary_columns(
+    file_path,
+    validators,
+    validator_column,
+    timestamp_column,
+    sequence_column,
+    weight_column,
+    last_event_column,
+    uuid_column,
+    parent_offsets,
+    parent_indices,
+):
+    # writes a DAG that is already laid out as columns, validator_column holding
+    # positions in validators and uuid_column the raw 16 bytes of every UUID
+    num_events = len(validator_column)
+    parent_indices = np.asarray(parent_indices, dtype=_u32)
+
+    validator_table = bytearray()
+    for validator in validators:
+        name = validator.encode("utf-8")
+        validator_table += struct.pack("<H", len(name)) + name
+
+    sections = [
+        bytes(validator_table),
+        np.asarray(validator_column, dtype=_u32).tobytes(),
+        np.asarray(timestamp_column, dtype=_u32).tobytes(),
+        np.asarray(sequence_column, dtype=_u32).tobytes(),
+        np.asarray(weight_column, dtype=_u32).tobytes(),
+        np.asarray(last_event_column, dtype=np.uint8).tobytes(),
+        bytes(uuid_column),
+        np.asarray(parent_offsets, dtype=_u32).tobytes(),
+        parent_indices.tobytes(),
+    ]
+
+    with open(file_path, "wb") as file:
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                0,
+                len(validators),
+                num_events,
+                len(parent_indices),
+            )
+        )
+        offset = HEADER.size
+        for section in sections:
+            file.write(b"\0" * _padding(offset))
+            offset += _padding(offset)
+            file.write(section)
+            offset += len(section)
+
+
+class BinaryDag:
+    def __init__(self, file_path):
+        with open(file_path, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, num_validators, num_events, num_edges = HEADER.unpack_from(
+            self.buffer
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{file_path} is not a binary DAG file")
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                f"{file_path} has binary DAG format version {version}, "
+                f"expected {FORMAT_VERSION}"
+            )
+
+        self.num_events = num_events
+        self.num_edges = num_edges
+        self.validators = []
+
+        offset = HEADER.size + _padding(HEADER.size)
+        for _ in range(num_validators):
+            (length,) = struct.unpack_from("<H", self.buffer, offset)
+            offset += 2
+            self.validators.append(
+                bytes(self.buffer[offset : offset + length]).decode("utf-8")
+            )
+            offset += length
+
+        def column(dtype, count, width=1):
+            nonlocal offset
+            offset += _padding(offset)
+            array = np.frombuffer(
+                self.buffer, dtype=dtype, count=count * width, offset=offset
+            )
+            offset += array.nbytes
+            return array if width == 1 else array.reshape(count, width)
+
+        self.validator = column(_u32, num_events)
+        self.timestamp = column(_u32, num_events)
+        self.sequence = column(_u32, num_events)
+        self.weight = column(_u32, num_events)
+        self.last_event = column(np.uint8, num_events)
+        self.uuid = column(np.uint8, num_events, 16)
+        self.parent_offsets = column(_u32, num_events + 1)
+        self.parent_indices = column(_u32, num_edges)
+
+    def uuid_strings(self):
+        return unpack_uuids(self.uuid)
+
+    def parents(self, event_id):
+        return self.parent_indices[
+            self.parent_offsets[event_id] : self.parent_offsets[event_id + 1]
+        ]
+
+    def close(self):
+        # numpy views keep the mapping alive, so drop them before unmapping
+        for name in (
+            "validator",
+            "timestamp",
+            "sequence",
+            "weight",
+            "last_event",
+            "uuid",
+            "parent_offsets",
+            "parent_indices",
+        ):
+            setattr(self, name, None)
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
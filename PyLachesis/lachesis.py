@@ -1,10 +1,17 @@
+from bisect import bisect_left, bisect_right
 from collections import deque
+import copy
+import heapq
+import itertools
 import os
 import re
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib.colors as mcolors
+import sys
+import time
+import numpy as np
 from sortedcontainers import SortedSet
+from checkpoint import read_checkpoint, write_checkpoint
+from dag_format import BinaryDag, is_binary_dag, pack_uuids, unpack_uuids
+from render import dag_snapshot, render_dag
 
 # this variable dictates how much "foresight" validators are allowed to have
 # meaning, only validators within this field of view are known/seen and therefore
@@ -12,38 +19,102 @@ from sortedcontainers import SortedSet
 global field_of_view
 field_of_view = 5
 
+# how many roots is_root tests against an event at once before checking whether
+# the forkless-caused weight already reaches the quorum
+root_batch_size = 64
 
-def parse_data(file_path):
-    event_list = []
+
+_event_pattern = re.compile(
+    r"^unique_id:\s([a-z0-9-]*)\slabel:\s\(([\w\t ]+),(\d+),(\d+),(\d+),(True|False)\)(.*)$",
+    re.MULTILINE,
+)
+_parent_pattern = re.compile(r"child_unique_id:\s([a-z0-9-]*)")
+
+# the direct parents of every Event start out as this shared empty set, and get
+# a set of their own once the first one is added
+_no_direct_parents = frozenset()
+
+
+def stream_text_data(file_path):
+    find_parents = _parent_pattern.findall
+    intern = sys.intern
 
     with open(file_path, "r") as file:
-        for line in file:
-            unique_id_match = re.search(r"unique_id:\s([a-z0-9-]*)", line)
-            label_match = re.search(
-                r"label:\s\(([\w\s]+),(\d+),(\d+),(\d+),(True|False)\)", line
-            )
-            if not (unique_id_match and label_match):
-                continue
+        buffer = file.read()
 
-            unique_id = unique_id_match.group(1)
-            validator, timestamp, sequence, weight, last_event = label_match.groups()
+    for match in _event_pattern.finditer(buffer):
+        (
+            unique_id,
+            validator,
+            timestamp,
+            sequence,
+            weight,
+            last_event,
+            children,
+        ) = match.groups()
+
+        event = Event(
+            intern(validator),
+            int(timestamp),
+            int(sequence),
+            int(weight),
+            intern(unique_id),
+            last_event == "True",
+        )
+        event.parents = [intern(p) for p in find_parents(children)]
+
+        yield event
+
+
+def stream_binary_data(file_path):
+    with BinaryDag(file_path) as dag:
+        uuids = dag.uuid_strings()
+        validators = [dag.validators[v] for v in dag.validator.tolist()]
+        timestamps = dag.timestamp.tolist()
+        sequences = dag.sequence.tolist()
+        weights = dag.weight.tolist()
+        last_events = dag.last_event.tolist()
+        parent_offsets = dag.parent_offsets.tolist()
+        parent_indices = dag.parent_indices.tolist()
+
+    for i, unique_id in enumerate(uuids):
+        event = Event(
+            validators[i],
+            timestamps[i],
+            sequences[i],
+            weights[i],
+            unique_id,
+            last_events[i] == 1,
+        )
+        event.parents = [
+            uuids[p] for p in parent_indices[parent_offsets[i] : parent_offsets[i + 1]]
+        ]
 
-            event = Event(
-                validator,
-                int(timestamp),
-                int(sequence),
-                int(weight),
-                unique_id,
-                last_event == "True",
-            )
+        yield event
+
+
+def stream_data(file_path):
+    if is_binary_dag(file_path):
+        return stream_binary_data(file_path)
+    return stream_text_data(file_path)
+
+
+def parse_data(file_path):
+    return list(stream_text_data(file_path))
+
+
+def parse_binary_data(file_path):
+    return list(stream_binary_data(file_path))
 
-            event_list.append(event)
 
-            child_unique_ids = re.findall(r"child_unique_id:\s([a-z0-9-]*)", line)
-            for child_unique_id in child_unique_ids:
-                event.add_parent(child_unique_id)
+def load_data(file_path):
+    return list(stream_data(file_path))
 
-    return event_list
+
+def record_highest(sequences, event):
+    highest = sequences.get(event.validator)
+    if highest is None or event.original_sequence > highest[0]:
+        sequences[event.validator] = (event.original_sequence, event.uuid)
 
 
 def filter_validators_and_weights(events):
@@ -58,28 +129,263 @@ def filter_validators_and_weights(events):
     return validators, validator_weights
 
 
-class Event:
-    def __init__(
-        self, validator, timestamp, sequence, weight, unique_id, last_event=False
-    ):
+class Interner:
+    __slots__ = ("ids", "keys")
+
+    def __init__(self):
+        self.ids = {}
+        self.keys = []
+
+    def intern(self, key):
+        key_id = self.ids.get(key)
+        if key_id is None:
+            key_id = self.ids[key] = len(self.keys)
+            self.keys.append(key)
+        return key_id
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def grow(array, shape, fill):
+    if all(n <= size for n, size in zip(shape, array.shape)):
+        return array
+    capacity = tuple(
+        max(n, 2 * size, 8) if n > size else size for n, size in zip(shape, array.shape)
+    )
+    grown = np.full(capacity, fill, dtype=array.dtype)
+    grown[tuple(slice(0, size) for size in array.shape)] = array
+    return grown
+
+
+# bitsets are uint8 arrays holding the bit of position i in bit i & 7 of byte i >> 3,
+# the last axis of a bitset indexes the bytes
+def bitset_size(num_bits):
+    return (num_bits + 7) >> 3
+
+
+def test_bits(bitset, positions):
+    return (bitset[..., positions >> 3] >> (positions & 7)) & 1 == 1
+
+
+def pack_bitset(bits):
+    return np.packbits(bits, axis=-1, bitorder="little")
+
+
+def unpack_bitset(bitset, num_bits):
+    return np.unpackbits(bitset, axis=-1, count=num_bits, bitorder="little").astype(
+        bool
+    )
+
+
+class VectorClocks:
+    __slots__ = ("sequences", "indices")
+
+    def __init__(self):
+        self.sequences = np.zeros((0, 0), dtype=np.int32)
+        self.indices = np.full((0, 0), -1, dtype=np.int32)
+
+    def reserve(self, num_events, num_validators):
+        self.sequences = grow(self.sequences, (num_events, num_validators), 0)
+        self.indices = grow(self.indices, (num_events, num_validators), -1)
+
+
+class FrameTracker:
+    __slots__ = ("frames", "counts", "deactivation_times", "deactivating")
+
+    def __init__(self):
+        self.frames = {}
+        self.counts = {}
+        self.deactivation_times = {}
+        self.deactivating = SortedSet()
+
+    def count(self, frame, delta):
+        if frame is not None:
+            count = self.counts.get(frame, 0) + delta
+            if count:
+                self.counts[frame] = count
+            else:
+                del self.counts[frame]
+
+    def set_frame(self, validator, frame):
+        if validator not in self.deactivation_times:
+            self.count(self.frames.get(validator), -1)
+            self.count(frame, 1)
+        self.frames[validator] = frame
+
+    def set_deactivation_time(self, validator, time):
+        if validator in self.deactivation_times:
+            self.deactivating.discard((self.deactivation_times[validator], validator))
+        else:
+            self.count(self.frames.get(validator), -1)
+        self.deactivation_times[validator] = time
+        self.deactivating.add((time, validator))
+
+    def lowest(self, time):
+        # validators that have emitted their last event only count until then
+        frames = list(self.counts)
+        for _, validator in self.deactivating.irange(minimum=(time,)):
+            if self.frames.get(validator) is not None:
+                frames.append(self.frames[validator])
+        return min(frames) if frames else 1
+
+
+class Profiler:
+    # timers and counters of the phases of process_events, collected only by the
+    # instances that are given a Profiler; several instances can share one
+    def __init__(self):
+        self.phase_times = {}
+        self.phase_calls = {}
+        self.counters = {}
+        self.histograms = {}
+
+    def run_phase(self, phase, method, *args):
+        start = time.perf_counter_ns()
+        result = method(*args)
+        self.phase_times[phase] = (
+            self.phase_times.get(phase, 0) + time.perf_counter_ns() - start
+        )
+        self.phase_calls[phase] = self.phase_calls.get(phase, 0) + 1
+        return result
+
+    def count(self, counter, amount=1):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record(self, histogram, value):
+        # how often each value occurred, for quantities that have to be bounded
+        # per call rather than only in total
+        counts = self.histograms.setdefault(histogram, {})
+        counts[value] = counts.get(value, 0) + 1
+
+    def summary(self):
+        return {
+            "phases": {
+                phase: {
+                    "calls": self.phase_calls[phase],
+                    "seconds": self.phase_times[phase] / 1e9,
+                }
+                for phase in self.phase_times
+            },
+            "counters": dict(self.counters),
+            "histograms": {
+                histogram: dict(sorted(counts.items()))
+                for histogram, counts in self.histograms.items()
+            },
+        }
+
+
+def merge_profiles(summaries):
+    merged = {"phases": {}, "counters": {}, "histograms": {}}
+    for summary in summaries:
+        for phase, totals in summary["phases"].items():
+            merged_totals = merged["phases"].setdefault(
+                phase, {"calls": 0, "seconds": 0.0}
+            )
+            merged_totals["calls"] += totals["calls"]
+            merged_totals["seconds"] += totals["seconds"]
+        for counter, amount in summary["counters"].items():
+            merged["counters"][counter] = merged["counters"].get(counter, 0) + amount
+        for histogram, counts in summary.get("histograms", {}).items():
+            merged_counts = merged["histograms"].setdefault(histogram, {})
+            for value, count in counts.items():
+                merged_counts[value] = merged_counts.get(value, 0) + count
+    return merged
+
+
+class EventCore:
+    # the parts of an event that never change once it is parsed, shared by every
+    # Lachesis instance that processes the event
+    __slots__ = (
+        "validator",
+        "timestamp",
+        "original_sequence",
+        "weight",
+        "uuid",
+        "last_event",
+    )
+
+    def __init__(self, validator, timestamp, sequence, weight, unique_id, last_event):
         self.validator = validator
         self.timestamp = timestamp
         self.original_sequence = sequence
-        self.sequence = sequence
         self.weight = weight
         self.uuid = unique_id
+        self.last_event = last_event
+
+
+class Event:
+    __slots__ = (
+        "core",
+        "sequence",
+        "frame",
+        "root",
+        "atropos",
+        "index",
+        "validator_id",
+        "lamport",
+        "block",
+        "parents",
+        "direct_parents",
+    )
+
+    def __init__(
+        self, validator, timestamp, sequence, weight, unique_id, last_event=False
+    ):
+        self.core = EventCore(
+            validator, timestamp, sequence, weight, unique_id, last_event
+        )
+        self.reset()
+        self.parents = []
+
+    def reset(self):
+        self.sequence = self.core.original_sequence
         self.frame = None
         self.root = False
         self.atropos = False
-        self.highest_observed = {}
-        self.lowest_observing = {}
-        self.parents = []
-        self.visited = {}
-        self.last_event = last_event
-        self.direct_parents = set()
+        self.index = None
+        self.validator_id = None
+        self.lamport = 0
+        self.block = None
+        self.direct_parents = _no_direct_parents
+
+    def share(self):
+        # a fresh view of the event for another instance: the core and the parent
+        # list are shared, and are never modified in place, only rebound
+        event = Event.__new__(Event)
+        event.core = self.core
+        event.reset()
+        event.parents = self.parents
+        return event
+
+    @property
+    def validator(self):
+        return self.core.validator
+
+    @property
+    def timestamp(self):
+        return self.core.timestamp
+
+    @property
+    def original_sequence(self):
+        return self.core.original_sequence
+
+    @property
+    def weight(self):
+        return self.core.weight
+
+    @property
+    def uuid(self):
+        return self.core.uuid
+
+    @property
+    def last_event(self):
+        return self.core.last_event
 
     def add_parent(self, parent_uuid):
-        self.parents.append(parent_uuid)
+        self.parents = self.parents + [parent_uuid]
 
     def __repr__(self):
         return f"\nEvent({self.validator}, {self.timestamp}, {self.sequence}, {self.weight}, \
@@ -121,10 +427,22 @@ class Event:
 
 
 class LachesisMultiInstance:
-    def __init__(self, graph_results=False):
+    def __init__(
+        self,
+        graph_results=False,
+        bootstrap=False,
+        verify_bootstrap=False,
+        profiler=None,
+        prune_horizon=None,
+    ):
         self.file_path = None
         self.instances = {}
         self.graph_results = graph_results
+        self.bootstrap = bootstrap
+        self.verify_bootstrap = verify_bootstrap
+        self.bootstrap_checks = {}
+        self.profiler = profiler
+        self.prune_horizon = prune_horizon
         self.initial_validators = []
         self.initial_validator_weights = {}
         self.validators = []
@@ -138,20 +456,30 @@ class LachesisMultiInstance:
         self.time = 0
         self.maximum_frame = 1
         self.minimum_frame = 1
-
-    def parse_and_initialize(self):
-        event_list = parse_data(self.file_path)
-        (
-            self.initial_validators,
-            self.initial_validator_weights,
-        ) = filter_validators_and_weights(event_list)
-
-        uuid_validator_map = {}
-        for event in event_list:
-            uuid_validator_map[event.uuid] = event.validator
+        self.highest_instance_frame = 1
+        self.frame_tracker = FrameTracker()
+
+    def parse_and_initialize(self, pipeline=None):
+        if pipeline is not None:
+            event_list = pipeline.events()
+            self.initial_validators = list(pipeline.validators)
+            self.initial_validator_weights = dict(pipeline.validator_weights)
+            uuid_validator_map = pipeline.uuid_validator_map
+        else:
+            event_list = load_data(self.file_path)
+            (
+                self.initial_validators,
+                self.initial_validator_weights,
+            ) = filter_validators_and_weights(event_list)
+
+            uuid_validator_map = {}
+            for event in event_list:
+                uuid_validator_map[event.uuid] = event.validator
 
         for validator in self.initial_validators:
-            lachesis_instance = Lachesis(validator)
+            lachesis_instance = Lachesis(
+                validator, profiler=self.profiler, prune_horizon=self.prune_horizon
+            )
             lachesis_instance.initialize_validators(
                 self.initial_validators, self.initial_validator_weights
             )
@@ -160,6 +488,7 @@ class LachesisMultiInstance:
             self.validator_weights[validator] = self.initial_validator_weights[
                 validator
             ]
+            self.refresh_validator_frame(validator)
 
         return event_list, uuid_validator_map
 
@@ -167,23 +496,100 @@ class LachesisMultiInstance:
         self.validators.append(event.validator)
         self.validator_weights[event.validator] = event.weight
         self.activated_time[event.validator] = self.time
-        lachesis_instance = Lachesis(event.validator)
+        self.instances[event.validator] = self.new_instance(event.validator)
+        self.refresh_validator_frame(event.validator)
+
+    def new_instance(self, validator):
+        lachesis_instance = Lachesis(
+            validator, profiler=self.profiler, prune_horizon=self.prune_horizon
+        )
         lachesis_instance.initialize_validators(
             self.initial_validators, self.initial_validator_weights
         )
-        self.instances[event.validator] = lachesis_instance
         for v in self.activation_queue:
-            lachesis_instance.activation_queue[v] = self.activation_queue[v]
+            lachesis_instance.queue_activation(v, *self.activation_queue[v])
         for v in self.deactivation_queue:
-            lachesis_instance.deactivation_queue[v] = self.deactivation_queue[v]
+            lachesis_instance.queue_deactivation(v, self.deactivation_queue[v])
         for v in self.deactivation_time:
-            lachesis_instance.deactivation_time[v] = self.deactivation_time[v]
+            lachesis_instance.set_deactivation_time(v, self.deactivation_time[v])
+        return lachesis_instance
+
+    def replay_seen_events(self, lachesis_instance):
+        for seen_event in self.seen_events:
+            lachesis_instance.enqueue_event(seen_event)
+
+    def trim_seen_events(self):
+        # a bootstrapped instance starts from a peer, which has compacted the
+        # Events older than its pruned_time, so the seen Events older than that of
+        # every instance are never replayed again
+        horizon = min(instance.pruned_time for instance in self.instances.values())
+        trimmed = 0
+        while (
+            trimmed < len(self.seen_events)
+            and self.seen_events[trimmed].timestamp < horizon
+        ):
+            trimmed += 1
+        if trimmed:
+            del self.seen_events[:trimmed]
+
+    def bootstrap_peer(self, validator):
+        # the peer that has decided the most frames, and processed the most
+        # events among those, in the order the validators joined
+        peers = [
+            instance
+            for v, instance in self.instances.items()
+            if v != validator and instance.frame_to_decide > 1
+        ]
+        if not peers:
+            return None
+        return max(peers, key=lambda i: (i.frame_to_decide, len(i.events)))
+
+    def bootstrap_instance(self, validator):
+        peer = self.bootstrap_peer(validator) if self.bootstrap else None
+        if peer is None:
+            self.replay_seen_events(self.instances[validator])
+            return
+
+        lachesis_instance = peer.snapshot(validator)
+        for seen_event in self.seen_events:
+            if seen_event.uuid not in lachesis_instance.uuid_event_dict:
+                lachesis_instance.enqueue_event(seen_event)
+
+        if self.verify_bootstrap:
+            self.bootstrap_checks[validator] = self.check_bootstrap(
+                validator, lachesis_instance
+            )
 
-    def process(self):
+        self.instances[validator] = lachesis_instance
+        self.refresh_validator_frame(validator)
+
+    def check_bootstrap(self, validator, lachesis_instance):
+        # process a copy of the bootstrapped instance and a full replay side by side
+        # and compare the consensus they reach, leaving the run itself untouched
+        bootstrapped = lachesis_instance.snapshot(validator, keep_queue=True)
+        replayed = self.new_instance(validator)
+        self.replay_seen_events(replayed)
+        bootstrapped.process_deferred_events()
+        replayed.process_deferred_events()
+        return bootstrapped.consensus_state() == replayed.consensus_state()
+
+    def refresh_validator_frame(self, validator):
+        # validators count with the frame their own instance has reached, or with
+        # frame 1 if they have not appeared yet and are not waiting for activation
+        highest_frame = self.instances[validator].validator_highest_frame
+        if validator in highest_frame:
+            frame = highest_frame[validator]
+        elif validator not in self.activation_queue:
+            frame = 1
+        else:
+            frame = None
+        self.frame_tracker.set_frame(validator, frame)
+
+    def process(self, pipeline=None):
         (
             event_list,
             uuid_validator_map,
-        ) = self.parse_and_initialize()
+        ) = self.parse_and_initialize(pipeline)
 
         timestamp_event_dict = {}
 
@@ -192,37 +598,19 @@ class LachesisMultiInstance:
                 timestamp_event_dict[event.timestamp] = []
             timestamp_event_dict[event.timestamp].append(event)
 
-        max_timestamp = max(timestamp_event_dict.keys())
-        min_timestamp = min(timestamp_event_dict.keys())
-
-        for timestamp in range(min_timestamp, max_timestamp + 1):
+        # nothing is queued between timestamps, so timestamps without events
+        # cannot change any instance
+        for timestamp in sorted(timestamp_event_dict):
             self.time = timestamp
 
-            current_timestamp_events = timestamp_event_dict.get(timestamp, [])
+            current_timestamp_events = timestamp_event_dict[timestamp]
 
-            max_frame = max([self.instances[v].frame for v in self.validators])
+            max_frame = self.highest_instance_frame
 
             if max_frame > self.maximum_frame:
                 self.maximum_frame = max_frame
 
-            frames = []
-            for v in self.validators:
-                if (
-                    v not in self.deactivation_time
-                    or self.time <= self.deactivation_time[v]
-                ):
-                    # one of the initial validators has not appeared, initialize as 1
-                    if (
-                        v not in self.instances[v].validator_highest_frame
-                        and v not in self.activation_queue
-                    ):
-                        frames.append(1)
-                    # all other validators must be present (latent validators must first appear)
-                    # to account for their frames
-                    elif v in self.instances[v].validator_highest_frame:
-                        frames.append(self.instances[v].validator_highest_frame[v])
-
-            min_frame = min(frames) if len(frames) > 0 else 1
+            min_frame = self.frame_tracker.lowest(self.time)
 
             if min_frame >= self.minimum_frame:
                 self.minimum_frame = min_frame
@@ -233,26 +621,29 @@ class LachesisMultiInstance:
                 if event.last_event:
                     self.deactivation_queue[event.validator] = self.maximum_frame + 2
                     self.deactivation_time[event.validator] = event.timestamp
+                    self.frame_tracker.set_deactivation_time(
+                        event.validator, event.timestamp
+                    )
                     for validator in self.validators:
-                        self.instances[validator].deactivation_queue[
-                            event.validator
-                        ] = (self.maximum_frame + 2)
-                        self.instances[validator].deactivation_time[
-                            event.validator
-                        ] = event.timestamp
+                        self.instances[validator].queue_deactivation(
+                            event.validator, self.maximum_frame + 2
+                        )
+                        self.instances[validator].set_deactivation_time(
+                            event.validator, event.timestamp
+                        )
 
                 if self.time > field_of_view:
                     if (
-                        event.validator not in self.validators
+                        event.validator not in self.frame_tracker.frames
                         and event.validator not in self.queued_validators
                     ):
                         self.queued_validators.add(event.validator)
                         (f, w) = self.maximum_frame + 1, event.weight
                         self.activation_queue[event.validator] = (f, w)
                         for validator in self.validators:
-                            self.instances[validator].activation_queue[
-                                event.validator
-                            ] = (f, w)
+                            self.instances[validator].queue_activation(
+                                event.validator, f, w
+                            )
                         continue
 
                     if (
@@ -266,19 +657,7 @@ class LachesisMultiInstance:
                             if uuid_validator_map[p] != event.validator
                         ]
                         self.add_validator(event)
-                        for seen_event in self.seen_events.copy():
-                            cleared_event = Event(
-                                seen_event.validator,
-                                seen_event.timestamp,
-                                seen_event.original_sequence,
-                                seen_event.weight,
-                                seen_event.uuid,
-                                seen_event.last_event,
-                            )
-                            cleared_event.parents = seen_event.parents
-                            self.instances[event.validator].process_queue[
-                                seen_event.uuid
-                            ] = cleared_event
+                        self.bootstrap_instance(event.validator)
 
                     if (
                         event.validator not in self.instances
@@ -297,46 +676,63 @@ class LachesisMultiInstance:
                     )
                 ]
 
-                cleared_event = Event(
-                    event.validator,
-                    event.timestamp,
-                    event.original_sequence,
-                    event.weight,
-                    event.uuid,
-                    event.last_event,
-                )
-                cleared_event.parents = event.parents
-                timestamp_events.append(cleared_event)
+                timestamp_events.append(event)
 
                 instance = self.instances[event.validator]
                 instance.defer_event(event, self.instances, uuid_validator_map)
 
             for instance in self.instances.values():
-                instance.process_request_queue(self.instances)
+                if self.profiler is None:
+                    instance.process_request_queue(self.instances)
+                else:
+                    self.profiler.run_phase(
+                        "process_request_queue",
+                        instance.process_request_queue,
+                        self.instances,
+                    )
 
-            for instance in self.instances.values():
-                instance.process_deferred_events()
+            for validator, instance in self.instances.items():
+                if instance.process_queue:
+                    instance.process_deferred_events()
+                    self.highest_instance_frame = max(
+                        self.highest_instance_frame, instance.frame
+                    )
+                    self.refresh_validator_frame(validator)
 
             self.seen_events.extend(timestamp_events)
+            if self.bootstrap and self.prune_horizon is not None:
+                self.trim_seen_events()
 
     def run_lachesis_multiinstance(
-        self, input_filename, output_folder, graph_results=False
+        self,
+        input_filename,
+        output_folder,
+        graph_results=False,
+        pipeline=None,
+        renderer=None,
+        key=None,
     ):
         self.file_path = input_filename
         self.graph_results = graph_results
-        self.process()
-
-        reference = Lachesis()
-        reference.run_lachesis(
-            input_filename, "./result.pdf", graph_results=graph_results
-        )
+        self.process(pipeline)
+
+        if pipeline is not None:
+            reference = pipeline.reference_run()
+        else:
+            reference = Lachesis()
+            reference.run_lachesis(
+                input_filename, "./result.pdf", graph_results=graph_results
+            )
 
         if self.graph_results:
             for validator, instance in self.instances.items():
                 output_filename = os.path.join(
                     output_folder, f"validator_{validator}_result.pdf"
                 )
-                instance.graph_results(output_filename)
+                if renderer is not None:
+                    renderer.submit(instance, output_filename, key=key)
+                else:
+                    instance.graph_results(output_filename)
 
         for instance in self.instances.values():
             assert (
@@ -379,7 +775,81 @@ class LachesisMultiInstance:
 
 
 class Lachesis:
-    def __init__(self, validator=None):
+    # the steps every Event goes through in process_events, in order, before the
+    # election pass of process_known_roots
+    event_phases = (
+        "add_event_index",
+        "detect_forks",
+        "set_highest_events_observed",
+        "set_lowest_observing_events",
+        "set_roots",
+        "record_event",
+    )
+    # the attributes a checkpoint stores as they are, every other attribute holds
+    # Events, arrays or containers that are converted on the way in and out
+    checkpoint_attributes = (
+        "validator",
+        "validators",
+        "validator_weights",
+        "time",
+        "frame",
+        "epoch",
+        "root_set_validators",
+        "validator_cheater_list",
+        "validator_cheater_times",
+        "validator_cheater_frames",
+        "validator_highest_frame",
+        "activation_queue",
+        "deactivation_queue",
+        "deactivation_time",
+        "cheater_deactivation_frames",
+        "unconfirmed_cheaters",
+        "activation_frames",
+        "active_validators",
+        "active_stake",
+        "ledger_frame",
+        "frame_stakes",
+        "frame_changes",
+        "frame_validators",
+        "observer_stake",
+        "observer_frames",
+        "pending_activations",
+        "quorum_cache",
+        "suspected_cheaters",
+        "confirmed_cheaters",
+        "atropos_roots",
+        "frame_root_weights",
+        "election_progress",
+        "election_pending",
+        "block",
+        "frame_to_decide",
+        "maximum_frame",
+        "minimum_frame",
+        "leaves",
+        "forked_validators",
+        "processed_sequences",
+        "queued_sequences",
+        "sync_sizes",
+        "max_pending",
+        "pending_parents",
+        "pending_children",
+        "skipped_events",
+        "prune_horizon",
+        "pruned_frame",
+        "pruned_time",
+        "compacted_events",
+    )
+
+    def __init__(
+        self,
+        validator=None,
+        on_atropos=None,
+        max_pending=10000,
+        profiler=None,
+        prune_horizon=None,
+        on_block=None,
+        on_evict=None,
+    ):
         self.validator = validator
         self.validators = []
         self.validator_weights = {}
@@ -389,17 +859,29 @@ class Lachesis:
         self.epoch = 1
         self.root_set_validators = {}
         self.root_set_events = {}
-        self.observed_sequences = {}
         self.validator_cheater_list = {}
         self.validator_cheater_times = {}
         self.validator_cheater_frames = {}
-        self.validator_visited_events = {}
+        self.validator_visited_events = np.zeros((0, 0), dtype=np.uint8)
+        self.observed_sequences = np.zeros((0, 0, 0), dtype=np.uint8)
+        self.observed_offsets = np.zeros(0, dtype=np.int64)
         self.validator_highest_frame = {}
         self.activation_queue = {}
         self.deactivation_queue = {}
         self.deactivation_time = {}
-        self.deactivated_validators = set()
-        self.deactivated_cheaters = set()
+        self.frame_tracker = FrameTracker()
+        self.cheater_deactivation_frames = {}
+        self.unconfirmed_cheaters = set()
+        self.activation_frames = {}
+        self.active_validators = {}
+        self.active_stake = 0
+        self.ledger_frame = 0
+        self.frame_stakes = {}
+        self.frame_changes = {}
+        self.frame_validators = {}
+        self.observer_stake = {}
+        self.observer_frames = {}
+        self.pending_activations = []
         self.quorum_cache = {}
         self.uuid_event_dict = {}
         self.suspected_cheaters = set()
@@ -407,6 +889,11 @@ class Lachesis:
         self.election_votes = {}
         self.atropos_roots = {}
         self.decided_roots = {}
+        self.frame_root_weights = {}
+        self.election_progress = {}
+        self.election_tallies = {}
+        self.election_pending = False
+        self.election_queue = []
         self.block = 1
         self.frame_to_decide = 1
         self.request_queue = deque()
@@ -414,24 +901,264 @@ class Lachesis:
         self.maximum_frame = 1
         self.minimum_frame = 1
         self.leaves = set()
+        self.validator_events = {}
+        self.validator_sequences = {}
+        self.forked_validators = set()
+        self.processed_sequences = {}
+        self.queued_sequences = {}
+        self.sync_sizes = {}
+        self.event_ids = Interner()
+        self.validator_ids = Interner()
+        self.highest_observed = VectorClocks()
+        self.lowest_observing = VectorClocks()
+        self.event_timestamps = np.zeros(0, dtype=np.int64)
+        self.validator_stake = np.zeros(0, dtype=np.int64)
+        self.on_atropos = on_atropos
+        self.on_block = on_block
+        self.on_evict = on_evict
+        self.profiler = profiler
+        self.max_pending = max_pending
+        self.pending_events = {}
+        self.pending_parents = {}
+        self.pending_children = {}
+        self.skipped_events = set()
+        self.prune_horizon = prune_horizon
+        self.pruned_frame = 1
+        self.pruned_time = 0
+        self.compacted_events = 0
 
     def initialize_validators(self, validators=None, validator_weights=None):
-        self.validators = [] if validators is None else validators.copy()
+        self.validators = []
         self.validator_weights = (
             {} if validator_weights is None else validator_weights.copy()
         )
+        self.activation_frames = {}
+        self.active_validators = {}
+        self.active_stake = 0
+        self.ledger_frame = 0
+        self.frame_stakes = {}
+        self.frame_changes = {}
+        self.observer_stake = {}
+        self.cheater_deactivation_frames = {}
+        self.unconfirmed_cheaters = set(self.suspected_cheaters)
+        self.frame_tracker = FrameTracker()
+        for validator, time in self.deactivation_time.items():
+            self.frame_tracker.set_deactivation_time(validator, time)
+        for validator, validator_id in self.validator_ids.ids.items():
+            self.validator_stake[validator_id] = self.validator_weights.get(validator, 0)
+        for validator in [] if validators is None else validators:
+            self.activate_validator(validator, self.validator_weights[validator])
+
+    def activate_validator(self, validator, weight):
+        self.set_validator_weight(validator, weight)
+        self.validators.append(validator)
+        self.refresh_validator_frame(validator)
+        frame = self.activation_queue.get(validator, (1, None))[0]
+        self.activation_frames[validator] = frame
+        self.frame_validators.setdefault(frame, set()).add(validator)
+        # a validator added once the ledger is past its activation frame counts
+        # from now on, its change is filed under that frame so a roll back to
+        # before it undoes it
+        if frame <= self.ledger_frame:
+            self.update_activity(validator, frame)
+
+    def counts_at(self, validator, frame):
+        return (
+            self.activation_frames.get(validator, frame + 1) <= frame
+            and self.deactivation_queue.get(validator, frame + 1) > frame
+            and self.cheater_deactivation_frames.get(validator, frame + 1) > frame
+        )
 
-    def defer_event(self, event, instances, uuid_validator_map):
-        cleared_event = Event(
-            event.validator,
-            event.timestamp,
-            event.original_sequence,
-            event.weight,
-            event.uuid,
-            event.last_event,
+    def update_activity(self, validator, frame):
+        if self.counts_at(validator, self.ledger_frame) != (
+            validator in self.active_validators
+        ):
+            self.toggle_activity(validator)
+            self.frame_changes.setdefault(frame, []).append(validator)
+
+    def toggle_activity(self, validator):
+        if validator in self.active_validators:
+            weight = -self.active_validators.pop(validator)
+        else:
+            weight = self.validator_weights[validator]
+            self.active_validators[validator] = weight
+        self.active_stake += weight
+        # observers count towards a cheater from two frames after their own frame
+        # of observing it, see suspect_cheater
+        for cheater, cheater_frame in self.validator_cheater_frames.get(
+            validator, {}
+        ).items():
+            if cheater_frame < self.ledger_frame:
+                self.observer_stake[cheater] = (
+                    self.observer_stake.get(cheater, 0) + weight
+                )
+
+    def advance_ledger(self):
+        # cheaters are confirmed against the stake of the previous frame, by the
+        # observers that counted at it
+        frame = self.ledger_frame + 1
+        threshold = 2 * self.active_stake // 3 + 1
+        confirmed = [
+            s
+            for s in self.unconfirmed_cheaters
+            if self.observer_stake.get(s, 0) >= threshold
+        ]
+        for s in confirmed:
+            self.unconfirmed_cheaters.remove(s)
+            self.cheater_deactivation_frames[s] = frame
+
+        self.ledger_frame = frame
+        for cheater, observer in self.observer_frames.get(frame, []):
+            if observer in self.active_validators:
+                self.observer_stake[cheater] = (
+                    self.observer_stake.get(cheater, 0)
+                    + self.active_validators[observer]
+                )
+
+        while self.pending_activations and self.pending_activations[0][0] <= frame:
+            f, _, v = heapq.heappop(self.pending_activations)
+            (queued_frame, w) = self.activation_queue.get(v, (None, None))
+            if queued_frame == f and v not in self.frame_tracker.frames:
+                self.activate_validator(v, w)
+
+        for validator in itertools.chain(
+            self.frame_validators.get(frame, ()), confirmed
+        ):
+            self.update_activity(validator, frame)
+        self.frame_stakes[frame] = self.active_stake
+
+    def roll_back_ledger(self):
+        # the exact inverse of advance_ledger, also undoing the changes filed
+        # under this frame after it was applied
+        frame = self.ledger_frame
+        for validator in reversed(self.frame_changes.pop(frame, [])):
+            self.toggle_activity(validator)
+        for cheater, observer in self.observer_frames.get(frame, []):
+            if observer in self.active_validators:
+                self.observer_stake[cheater] -= self.active_validators[observer]
+        self.ledger_frame = frame - 1
+        for s in [
+            s for s, f in self.cheater_deactivation_frames.items() if f == frame
+        ]:
+            del self.cheater_deactivation_frames[s]
+            self.unconfirmed_cheaters.add(s)
+        del self.frame_stakes[frame]
+
+    def queue_activation(self, validator, frame, weight):
+        previous = self.activation_queue.get(validator, (frame, None))[0]
+        self.activation_queue[validator] = (frame, weight)
+        if validator in self.frame_tracker.frames:
+            self.refresh_validator_frame(validator)
+        if validator in self.activation_frames:
+            self.activation_frames[validator] = frame
+            self.frame_validators.setdefault(frame, set()).add(validator)
+        heapq.heappush(
+            self.pending_activations, (frame, len(self.activation_queue), validator)
+        )
+        self.invalidate_quorum(min(previous, frame))
+
+    def set_deactivation_time(self, validator, time):
+        self.deactivation_time[validator] = time
+        self.frame_tracker.set_deactivation_time(validator, time)
+
+    def refresh_validator_frame(self, validator):
+        if validator in self.validator_highest_frame:
+            frame = self.validator_highest_frame[validator]
+        elif validator not in self.activation_queue:
+            frame = 1
+        else:
+            frame = None
+        self.frame_tracker.set_frame(validator, frame)
+
+    def queue_deactivation(self, validator, frame):
+        previous = self.deactivation_queue.get(validator, frame)
+        self.deactivation_queue[validator] = frame
+        self.frame_validators.setdefault(frame, set()).add(validator)
+        self.invalidate_quorum(min(previous, frame))
+
+    def invalidate_quorum(self, frame):
+        # quorums are cached in increasing frame order, so a queue change only
+        # affects the cache if it takes effect at or before the last cached frame,
+        # and the ledger is rolled back to before it
+        if self.quorum_cache and frame <= max(self.quorum_cache):
+            for cached_frame in [f for f in self.quorum_cache if f >= frame]:
+                del self.quorum_cache[cached_frame]
+        while self.ledger_frame >= max(frame, 1):
+            self.roll_back_ledger()
+
+    def set_validator_weight(self, validator, weight):
+        self.validator_weights[validator] = weight
+        validator_id = self.validator_ids.ids.get(validator)
+        if validator_id is not None:
+            self.validator_stake[validator_id] = weight
+
+    def add_event_index(self, event):
+        event.index = self.event_ids.intern(event.uuid)
+        event.validator_id = self.validator_ids.intern(event.validator)
+        event.lamport = 1 + max(
+            (self.uuid_event_dict[p].lamport for p in event.parents), default=0
+        )
+
+        num_events = len(self.event_ids)
+        num_validators = len(self.validator_ids)
+        self.highest_observed.reserve(num_events, num_validators)
+        self.lowest_observing.reserve(num_events, num_validators)
+        self.event_timestamps = grow(self.event_timestamps, (num_events,), 0)
+        self.event_timestamps[event.index] = event.timestamp
+        self.validator_stake = grow(self.validator_stake, (num_validators,), 0)
+        self.validator_stake[event.validator_id] = self.validator_weights.get(
+            event.validator, 0
+        )
+        self.validator_visited_events = grow(
+            self.validator_visited_events,
+            (num_validators, bitset_size(num_events)),
+            0,
+        )
+        self.observed_offsets = grow(self.observed_offsets, (num_validators,), 0)
+        self.observed_sequences = grow(
+            self.observed_sequences,
+            (
+                num_validators,
+                num_validators,
+                (event.sequence >> 3) - self.observed_offsets[event.validator_id] + 1,
+            ),
+            0,
         )
-        cleared_event.parents = event.parents
-        self.process_queue[event.uuid] = cleared_event
+
+    def add_to_chain(self, event):
+        if event.validator not in self.validator_events:
+            self.validator_events[event.validator] = []
+            self.validator_sequences[event.validator] = []
+        chain = self.validator_events[event.validator]
+        sequences = self.validator_sequences[event.validator]
+        sequence = event.original_sequence
+        if not sequences or sequences[-1] < sequence:
+            chain.append(event)
+            sequences.append(sequence)
+        else:
+            position = bisect_left(sequences, sequence)
+            if position < len(sequences) and sequences[position] == sequence:
+                self.forked_validators.add(event.validator)
+            chain.insert(position, event)
+            sequences.insert(position, sequence)
+        record_highest(self.processed_sequences, event)
+
+    def enqueue_event(self, event):
+        self.process_queue[event.uuid] = event.share()
+        record_highest(self.queued_sequences, event)
+
+    def known_sequences(self):
+        known = dict(self.processed_sequences)
+        for validator, (sequence, unique_id) in self.queued_sequences.items():
+            if validator not in known or sequence > known[validator][0]:
+                known[validator] = (sequence, unique_id)
+        return known
+
+    def knows(self, unique_id):
+        return unique_id in self.uuid_event_dict or unique_id in self.process_queue
+
+    def defer_event(self, event, instances, uuid_validator_map):
+        self.enqueue_event(event)
         for parent_uuid in event.parents:
             if (
                 parent_uuid not in self.process_queue
@@ -448,96 +1175,421 @@ class Lachesis:
                         (self.validator, parent_uuid)
                     )
 
+    def missing_events(self, requestor_instance, timestamp):
+        known = requestor_instance.known_sequences()
+        missing = []
+        diverged = set()
+        for validator, chain in self.validator_events.items():
+            if validator not in known:
+                missing.extend(e for e in chain if e.timestamp <= timestamp)
+                continue
+            sequence, unique_id = known[validator]
+            if validator in self.forked_validators:
+                diverged.add(validator)
+            elif unique_id in self.uuid_event_dict:
+                sequences = self.validator_sequences[validator]
+                if sequences[-1] > sequence:
+                    for event in chain[bisect_right(sequences, sequence) :]:
+                        if event.timestamp <= timestamp:
+                            missing.append(event)
+            elif not requestor_instance.knows(chain[-1].uuid):
+                diverged.add(validator)
+
+        if diverged:
+            # forked or diverged chains are walked down from their leaves and cut
+            # at the Events the requestor already has
+            stack = [
+                self.uuid_event_dict[u]
+                for u in self.leaves
+                if u in self.uuid_event_dict
+                and self.uuid_event_dict[u].validator in diverged
+            ]
+            reached = set()
+            while stack:
+                event = stack.pop()
+                if event.uuid in reached or requestor_instance.knows(event.uuid):
+                    continue
+                reached.add(event.uuid)
+                if event.timestamp <= timestamp:
+                    missing.append(event)
+                stack.extend(
+                    self.uuid_event_dict[p]
+                    for p in event.direct_parents
+                    if p in self.uuid_event_dict
+                )
+
+            if self.profiler is not None:
+                self.profiler.count("sync_walk_visits", len(reached))
+
+        missing.sort(key=lambda e: (e.timestamp, e.original_sequence, e.uuid))
+        return missing
+
     def process_request_queue(self, instances):
+        # requests of one requestor are merged into a single sync up to the latest
+        # requested timestamp, which ships the same events as syncing them one by one
+        requests = {}
         while self.request_queue:
             requestor_id, requested_uuid = self.request_queue.popleft()
+            if requested_uuid not in self.uuid_event_dict:
+                # pruned since it was requested
+                continue
+            timestamp = self.uuid_event_dict[requested_uuid].timestamp
+            requests[requestor_id] = max(requests.get(requestor_id, 0), timestamp)
+
+        for requestor_id, timestamp in requests.items():
             requestor_instance = instances[requestor_id]
-            requested_event = self.uuid_event_dict[requested_uuid]
+            missing = self.missing_events(requestor_instance, timestamp)
+            for event in missing:
+                requestor_instance.enqueue_event(event)
+            self.sync_sizes[len(missing)] = self.sync_sizes.get(len(missing), 0) + 1
+
+    def snapshot(self, validator, keep_queue=False):
+        # Events are copied with their derived state, but keep sharing their cores
+        memo = {
+            id(event.core): event.core
+            for event in itertools.chain(
+                self.uuid_event_dict.values(), self.process_queue.values()
+            )
+        }
+        memo[id(self.on_atropos)] = self.on_atropos
+        memo[id(self.on_block)] = self.on_block
+        memo[id(self.on_evict)] = self.on_evict
+        memo[id(self.profiler)] = self.profiler
+        snapshot = copy.deepcopy(self, memo)
+        snapshot.validator = validator
+        snapshot.request_queue = deque()
+        snapshot.sync_sizes = {}
+        if not keep_queue:
+            snapshot.process_queue = {}
+            snapshot.queued_sequences = {}
+        return snapshot
+
+    def consensus_state(self):
+        return (
+            self.frame,
+            self.block,
+            self.frame_to_decide,
+            {
+                event.uuid: (event.frame, event.root, event.atropos, event.sequence)
+                for event in self.events
+            },
+            dict(self.atropos_roots),
+        )
 
-            for leaf_uuid in self.leaves:
-                stack = [str(leaf_uuid)]
+    def save_checkpoint(self, file_path):
+        # the Events are stored as columns, the processed ones first in index order
+        # followed by the queued and pending ones, and every other reference to an
+        # Event is stored as its position in the columns
+        table = (
+            self.events
+            + list(self.process_queue.values())
+            + list(self.pending_events.values())
+        )
+        positions = {id(event): i for i, event in enumerate(table)}
+        num_events = len(self.events)
+        width = len(self.validator_ids)
+
+        # parents are stored as positions in the UUID column, which is followed by
+        # the UUIDs that are only referred to, such as missing parents
+        uuids = [event.uuid for event in table]
+        uuid_positions = {}
+        for i, unique_id in enumerate(uuids):
+            uuid_positions.setdefault(unique_id, i)
+
+        def uuid_position(unique_id):
+            if unique_id not in uuid_positions:
+                uuid_positions[unique_id] = len(uuids)
+                uuids.append(unique_id)
+            return uuid_positions[unique_id]
+
+        parent_offsets = [0]
+        parents = []
+        direct_parent_offsets = [0]
+        direct_parents = []
+        for event in table:
+            parents.extend(uuid_position(p) for p in event.parents)
+            parent_offsets.append(len(parents))
+            direct_parents.extend(
+                uuid_position(p) for p in sorted(event.direct_parents)
+            )
+            direct_parent_offsets.append(len(direct_parents))
+
+        event_validators = {}
+        for event in table:
+            event_validators.setdefault(event.validator, len(event_validators))
+
+        # the votes of elections are stored as columns of UUID positions, with the
+        # decided and yes flags of every vote as bits
+        votes = [
+            (frame, voter, candidate, vote)
+            for frame, frame_votes in self.election_votes.items()
+            for (voter, candidate), vote in frame_votes.items()
+        ]
+        vote_columns = {
+            "vote_frames": [vote[0] for vote in votes],
+            "vote_voters": [uuid_position(vote[1]) for vote in votes],
+            "vote_candidates": [uuid_position(vote[2]) for vote in votes],
+            "vote_flags": [vote[3]["decided"] + 2 * vote[3]["yes"] for vote in votes],
+            "decided_roots": [uuid_position(u) for u in self.decided_roots],
+            "decided_flags": [
+                vote["decided"] + 2 * vote["yes"]
+                for vote in self.decided_roots.values()
+            ],
+        }
 
-                while stack:
-                    current_uuid = stack.pop()
+        chain_validators = list(self.validator_events)
 
-                    if (
-                        current_uuid in requestor_instance.uuid_event_dict
-                        or current_uuid in requestor_instance.process_queue
-                    ):
-                        continue
+        state = {
+            attribute: getattr(self, attribute)
+            for attribute in self.checkpoint_attributes
+        }
+        state.update(
+            {
+                "num_events": num_events,
+                "event_validators": list(event_validators),
+                "validator_ids": self.validator_ids.keys,
+                "root_set_events": {
+                    frame: [positions[id(event)] for event in roots]
+                    for frame, roots in self.root_set_events.items()
+                },
+                "election_frames": list(self.election_votes),
+                "chain_validators": chain_validators,
+                "process_queue": [
+                    positions[id(event)] for event in self.process_queue.values()
+                ],
+                "pending_events": [
+                    positions[id(event)] for event in self.pending_events.values()
+                ],
+                "election_tallies": {
+                    frame: tally.tolist()
+                    for frame, tally in self.election_tallies.items()
+                },
+                "request_queue": list(self.request_queue),
+                "frame_tracker": (
+                    self.frame_tracker.frames,
+                    self.frame_tracker.counts,
+                    self.frame_tracker.deactivation_times,
+                    list(self.frame_tracker.deactivating),
+                ),
+            }
+        )
 
-                    current_event = self.uuid_event_dict[str(current_uuid)]
+        arrays = {
+            "validator": np.array(
+                [event_validators[event.validator] for event in table], dtype=np.uint32
+            ),
+            "timestamp": np.array([event.timestamp for event in table], dtype=np.int64),
+            "original_sequence": np.array(
+                [event.original_sequence for event in table], dtype=np.int64
+            ),
+            "weight": np.array([event.weight for event in table], dtype=np.int64),
+            "last_event": np.array(
+                [event.last_event for event in table], dtype=np.uint8
+            ),
+            "sequence": np.array([event.sequence for event in table], dtype=np.int64),
+            "frame": np.array(
+                [-1 if event.frame is None else event.frame for event in table],
+                dtype=np.int64,
+            ),
+            "root": np.array([event.root for event in table], dtype=np.uint8),
+            "atropos": np.array([event.atropos for event in table], dtype=np.uint8),
+            "lamport": np.array([event.lamport for event in table], dtype=np.int64),
+            "block": np.array(
+                [-1 if event.block is None else event.block for event in table],
+                dtype=np.int64,
+            ),
+            "uuid": np.frombuffer(pack_uuids(uuids), dtype=np.uint8).reshape(-1, 16),
+            "parent_offsets": np.array(parent_offsets, dtype=np.int64),
+            "parents": np.array(parents, dtype=np.int64),
+            "direct_parent_offsets": np.array(direct_parent_offsets, dtype=np.int64),
+            "direct_parents": np.array(direct_parents, dtype=np.int64),
+            "highest_sequences": self.highest_observed.sequences[:num_events, :width],
+            "highest_indices": self.highest_observed.indices[:num_events, :width],
+            "lowest_sequences": self.lowest_observing.sequences[:num_events, :width],
+            "lowest_indices": self.lowest_observing.indices[:num_events, :width],
+            "visited_events": self.validator_visited_events[
+                :width, : bitset_size(num_events)
+            ],
+            "observed_sequences": self.observed_sequences[:width, :width],
+            "observed_offsets": self.observed_offsets[:width],
+            "event_timestamps": self.event_timestamps[:num_events],
+            "validator_stake": self.validator_stake[:width],
+            "chain_counts": np.array(
+                [len(self.validator_events[v]) for v in chain_validators],
+                dtype=np.int64,
+            ),
+            "chain_events": np.array(
+                [
+                    positions[id(event)]
+                    for validator in chain_validators
+                    for event in self.validator_events[validator]
+                ],
+                dtype=np.int64,
+            ),
+        }
+        for name, column in vote_columns.items():
+            arrays[name] = np.array(column, dtype=np.int64)
+
+        write_checkpoint(file_path, state, arrays)
+
+    def load_checkpoint(self, file_path):
+        # replaces the whole state of this instance, only the callbacks and the
+        # profiler are kept, since they cannot be written to a checkpoint
+        state, arrays = read_checkpoint(file_path)
+        num_events = state["num_events"]
+
+        uuids = unpack_uuids(arrays["uuid"])
+        event_validators = [sys.intern(v) for v in state["event_validators"]]
+        validators = arrays["validator"].tolist()
+        timestamps = arrays["timestamp"].tolist()
+        original_sequences = arrays["original_sequence"].tolist()
+        weights = arrays["weight"].tolist()
+        last_events = arrays["last_event"].tolist()
+        sequences = arrays["sequence"].tolist()
+        frames = arrays["frame"].tolist()
+        roots = arrays["root"].tolist()
+        atropos = arrays["atropos"].tolist()
+        lamports = arrays["lamport"].tolist()
+        blocks = arrays["block"].tolist()
+        parent_offsets = arrays["parent_offsets"].tolist()
+        parents = arrays["parents"].tolist()
+        direct_parent_offsets = arrays["direct_parent_offsets"].tolist()
+        direct_parents = arrays["direct_parents"].tolist()
+
+        self.validator_ids = Interner()
+        for validator in state["validator_ids"]:
+            self.validator_ids.intern(sys.intern(validator))
+
+        table = []
+        for i in range(len(validators)):
+            event = Event.__new__(Event)
+            event.core = EventCore(
+                event_validators[validators[i]],
+                timestamps[i],
+                original_sequences[i],
+                weights[i],
+                uuids[i],
+                last_events[i] == 1,
+            )
+            event.sequence = sequences[i]
+            event.frame = None if frames[i] == -1 else frames[i]
+            event.root = roots[i] == 1
+            event.atropos = atropos[i] == 1
+            event.lamport = lamports[i]
+            event.block = None if blocks[i] == -1 else blocks[i]
+            if i < num_events:
+                event.index = i
+                event.validator_id = self.validator_ids.ids[event.validator]
+            else:
+                event.index = None
+                event.validator_id = None
+            event.parents = [
+                uuids[p] for p in parents[parent_offsets[i] : parent_offsets[i + 1]]
+            ]
+            event.direct_parents = {
+                uuids[p]
+                for p in direct_parents[
+                    direct_parent_offsets[i] : direct_parent_offsets[i + 1]
+                ]
+            }
+            table.append(event)
 
-                    if current_event.timestamp <= requested_event.timestamp:
-                        cleared_event = Event(
-                            current_event.validator,
-                            current_event.timestamp,
-                            current_event.original_sequence,
-                            current_event.weight,
-                            current_event.uuid,
-                            current_event.last_event,
-                        )
-                        cleared_event.parents = current_event.parents
-                        requestor_instance.process_queue[current_uuid] = cleared_event
+        for attribute in self.checkpoint_attributes:
+            setattr(self, attribute, state[attribute])
 
-                    stack.extend(current_event.direct_parents)
+        self.events = table[:num_events]
+        self.uuid_event_dict = {event.uuid: event for event in self.events}
+        self.event_ids = Interner()
+        for event in self.events:
+            self.event_ids.intern(event.uuid)
+        self.root_set_events = {
+            frame: [table[i] for i in frame_roots]
+            for frame, frame_roots in state["root_set_events"].items()
+        }
+        self.validator_events = {}
+        chain_events = arrays["chain_events"].tolist()
+        start = 0
+        for validator, count in zip(
+            state["chain_validators"], arrays["chain_counts"].tolist()
+        ):
+            self.validator_events[validator] = [
+                table[i] for i in chain_events[start : start + count]
+            ]
+            start += count
+        self.validator_sequences = {
+            validator: [event.original_sequence for event in chain]
+            for validator, chain in self.validator_events.items()
+        }
+        self.process_queue = {
+            table[i].uuid: table[i] for i in state["process_queue"]
+        }
+        self.pending_events = {
+            table[i].uuid: table[i] for i in state["pending_events"]
+        }
+        self.election_tallies = {
+            frame: np.array(tally, dtype=np.int64)
+            for frame, tally in state["election_tallies"].items()
+        }
+        self.request_queue = deque(state["request_queue"])
+        self.frame_tracker = FrameTracker()
+        (
+            self.frame_tracker.frames,
+            self.frame_tracker.counts,
+            self.frame_tracker.deactivation_times,
+            deactivating,
+        ) = state["frame_tracker"]
+        self.frame_tracker.deactivating = SortedSet(deactivating)
+
+        self.highest_observed = VectorClocks()
+        self.highest_observed.sequences = arrays["highest_sequences"]
+        self.highest_observed.indices = arrays["highest_indices"]
+        self.lowest_observing = VectorClocks()
+        self.lowest_observing.sequences = arrays["lowest_sequences"]
+        self.lowest_observing.indices = arrays["lowest_indices"]
+        self.validator_visited_events = arrays["visited_events"]
+        self.observed_sequences = arrays["observed_sequences"]
+        self.observed_offsets = arrays["observed_offsets"]
+        self.event_timestamps = arrays["event_timestamps"]
+        self.validator_stake = arrays["validator_stake"]
+
+        self.election_votes = {frame: {} for frame in state["election_frames"]}
+        for frame, voter, candidate, flags in zip(
+            arrays["vote_frames"].tolist(),
+            arrays["vote_voters"].tolist(),
+            arrays["vote_candidates"].tolist(),
+            arrays["vote_flags"].tolist(),
+        ):
+            self.election_votes[frame][(uuids[voter], uuids[candidate])] = {
+                "decided": bool(flags & 1),
+                "yes": bool(flags & 2),
+            }
+        self.decided_roots = {
+            uuids[root]: {"decided": bool(flags & 1), "yes": bool(flags & 2)}
+            for root, flags in zip(
+                arrays["decided_roots"].tolist(), arrays["decided_flags"].tolist()
+            )
+        }
 
     def process_deferred_events(self):
         if self.process_queue:
             self.process_events(list(self.process_queue.values()))
             self.process_queue.clear()
+            self.queued_sequences.clear()
 
     def quorum(self, frame):
         if frame in self.quorum_cache:
+            if self.profiler is not None:
+                self.profiler.count("quorum_cache_hits")
             return self.quorum_cache[frame]
+        if self.profiler is not None:
+            self.profiler.count("quorum_cache_misses")
 
-        deactivated_cheaters = self.deactivated_cheaters.copy()
-        deactivated_validators = self.deactivated_validators.copy()
+        # the ledger only moves forward a frame at a time and keeps the stake of
+        # every frame it has passed, so a miss is a lookup once it is there
+        while self.ledger_frame < max(frame, 1):
+            self.advance_ledger()
 
-        for v in self.deactivation_queue:
-            if frame >= self.deactivation_queue[v]:
-                self.deactivated_validators.add(v)
-
-        active_validators = [
-            v
-            for v in self.validators
-            if (v not in deactivated_cheaters) and (v not in deactivated_validators)
-        ]
-
-        for s in self.suspected_cheaters:
-            if s not in deactivated_cheaters:
-                observed_weight = 0
-                for v in active_validators:
-                    if (
-                        v in self.validator_cheater_frames
-                        and s in self.validator_cheater_frames[v]
-                    ):
-                        if self.validator_cheater_frames[v][s] < frame - 1:
-                            observed_weight += self.validator_weights[v]
-                if (
-                    observed_weight
-                    >= 2
-                    * sum([self.validator_weights[v] for v in active_validators])
-                    // 3
-                    + 1
-                ):
-                    self.deactivated_cheaters.add(s)
-
-        for v in self.activation_queue:
-            (f, w) = self.activation_queue[v]
-            if frame >= f and v not in self.validators:
-                self.validator_weights[v] = w
-                self.validators.append(v)
-
-        weights_total = sum(
-            self.validator_weights[v]
-            for v in self.validators
-            if (v not in self.activation_queue or frame >= self.activation_queue[v][0])
-            and (v not in self.deactivated_cheaters)
-            and (v not in self.deactivated_validators)
-        )
-
-        self.quorum_cache[frame] = 2 * weights_total // 3 + 1
+        self.quorum_cache[frame] = 2 * self.frame_stakes[max(frame, 1)] // 3 + 1
         return self.quorum_cache[frame]
 
     def is_root(self, event):
@@ -554,15 +1606,18 @@ class Lachesis:
         if not frame_roots:
             return False
 
-        forkless_cause_weights = sum(
-            [
-                self.validator_weights[root.validator]
-                for root in frame_roots
-                if self.forkless_cause(event, root)
-            ]
-        )
+        quorum = self.quorum(event.frame)
+        forkless_cause_weights = 0
+        for start in range(0, len(frame_roots), root_batch_size):
+            roots = frame_roots[start : start + root_batch_size]
+            caused = self.forkless_cause_many(event, roots)
+            forkless_cause_weights += np.dot(
+                self.validator_stake[[root.validator_id for root in roots]], caused
+            )
+            if forkless_cause_weights >= quorum:
+                return True
 
-        return forkless_cause_weights >= self.quorum(event.frame)
+        return False
 
     def set_roots(self, event):
         if self.is_root(event):
@@ -573,6 +1628,18 @@ class Lachesis:
                     event.frame = self.activation_queue[event.validator][0]
             else:
                 event.frame += 1
+            if event.frame == self.frame_to_decide:
+                # a new candidate, which every root of the later frames votes on
+                self.election_pending = True
+            elif self.frame_to_decide < event.frame < self.frame:
+                self.election_queue.append(event)
+            elif self.frame < event.frame:
+                # the roots of the previous highest frame can vote now
+                self.election_queue.extend(
+                    self.election_roots(
+                        max(self.frame, self.frame_to_decide + 1), 0, event.frame
+                    )
+                )
             if self.frame < event.frame:
                 self.frame = event.frame
             if event.frame in self.root_set_events:
@@ -582,58 +1649,67 @@ class Lachesis:
                 self.root_set_events[event.frame] = [event]
                 self.root_set_validators[event.frame] = [event.validator]
                 self.quorum(event.frame)
+            self.frame_root_weights[event.frame] = self.frame_root_weights.get(
+                event.frame, 0
+            ) + self.validator_weights.get(event.validator, 0)
 
-        if event.validator not in self.validator_highest_frame:
-            self.validator_highest_frame[event.validator] = event.frame
-        elif event.frame > self.validator_highest_frame[event.validator]:
+        if (
+            event.validator not in self.validator_highest_frame
+            or event.frame > self.validator_highest_frame[event.validator]
+        ):
             self.validator_highest_frame[event.validator] = event.frame
+            if event.validator in self.frame_tracker.frames:
+                self.refresh_validator_frame(event.validator)
 
     def atropos_voting(self, new_root):
-        candidates = self.root_set_events[self.frame_to_decide]
+        if new_root.frame <= self.frame_to_decide:
+            return
 
-        for candidate in candidates:
-            if candidate.uuid in self.decided_roots:
-                continue
-
-            if self.frame_to_decide not in self.election_votes:
-                self.election_votes[self.frame_to_decide] = {}
-
-            if (new_root.uuid, candidate.uuid) not in self.election_votes[
-                self.frame_to_decide
-            ]:
-                vote = None
-
-                if new_root.frame == self.frame_to_decide + 1:
-                    vote = {
-                        "decided": False,
-                        "yes": self.forkless_cause(new_root, candidate),
-                    }
-                elif new_root.frame >= self.frame_to_decide + 2:
-                    yes_votes = 0
-                    no_votes = 0
-
-                    for prev_root in self.root_set_events[new_root.frame - 1]:
-                        prev_vote = self.election_votes[self.frame_to_decide].get(
-                            (prev_root.uuid, candidate.uuid), {"yes": False}
-                        )
-                        if prev_vote["yes"]:
-                            yes_votes += self.validator_weights[prev_root.validator]
-                        else:
-                            no_votes += self.validator_weights[prev_root.validator]
-
-                    vote = {
-                        "decided": yes_votes >= self.quorum(self.frame_to_decide)
-                        or no_votes >= self.quorum(self.frame_to_decide),
-                        "yes": yes_votes >= no_votes,
-                    }
-
-                if vote is not None:
-                    self.election_votes[self.frame_to_decide][
-                        (new_root.uuid, candidate.uuid)
-                    ] = vote
+        # every root votes once on every candidate of the frame to decide, so only
+        # the candidates added since its last call still need its vote
+        candidates = self.root_set_events[self.frame_to_decide]
+        handled = self.election_progress.get(new_root.uuid, 0)
+        if handled == len(candidates):
+            return
+        self.election_progress[new_root.uuid] = len(candidates)
 
-                    if vote["decided"]:
-                        self.decided_roots[candidate.uuid] = vote
+        positions = np.array(
+            [
+                i
+                for i in range(handled, len(candidates))
+                if candidates[i].uuid not in self.decided_roots
+            ],
+            dtype=np.int64,
+        )
+        if len(positions) == 0:
+            return
+        pending = [candidates[i] for i in positions]
+        votes = self.election_votes.setdefault(self.frame_to_decide, {})
+
+        if new_root.frame == self.frame_to_decide + 1:
+            yes = self.forkless_cause_many(new_root, pending)
+            decided = np.zeros(len(pending), dtype=bool)
+        else:
+            # the previous frame's roots that have not voted on a candidate count
+            # as voting no, so the no weight is the rest of that frame's root weight
+            previous_tally = self.election_tally(new_root.frame - 1, len(candidates))
+            yes_votes = previous_tally[positions]
+            no_votes = self.frame_root_weights[new_root.frame - 1] - yes_votes
+            quorum = self.quorum(self.frame_to_decide)
+            yes = yes_votes >= no_votes
+            decided = (yes_votes >= quorum) | (no_votes >= quorum)
+
+        tally = self.election_tally(new_root.frame, len(candidates))
+        tally[positions[yes]] += self.validator_weights.get(new_root.validator, 0)
+
+        for candidate, candidate_yes, candidate_decided in zip(pending, yes, decided):
+            vote = {"decided": bool(candidate_decided), "yes": bool(candidate_yes)}
+            votes[(new_root.uuid, candidate.uuid)] = vote
+            if candidate_decided:
+                self.decided_roots[candidate.uuid] = vote
+
+        if not decided.any():
+            return
 
         for candidate in sorted(
             candidates, key=lambda event: (-event.weight, event.uuid)
@@ -644,59 +1720,267 @@ class Lachesis:
             ):
                 self.atropos_roots[self.frame_to_decide] = candidate.uuid
                 candidate.atropos = True
+                if self.on_atropos is not None:
+                    self.on_atropos(self.frame_to_decide, candidate)
+                if self.profiler is None:
+                    block_events = self.finalize_block(candidate)
+                else:
+                    block_events = self.profiler.run_phase(
+                        "finalize_block", self.finalize_block, candidate
+                    )
+                if self.on_block is not None:
+                    self.on_block(self.block, block_events)
                 self.frame_to_decide += 1
                 self.block += 1
+                self.election_progress.clear()
+                self.election_tallies.clear()
+                self.election_pending = True
+                if self.prune_horizon is not None:
+                    if self.profiler is None:
+                        self.prune_history()
+                    else:
+                        self.profiler.run_phase("prune_history", self.prune_history)
                 return
 
-    def process_known_roots(self):
-        for frame in range(self.frame_to_decide + 1, self.frame):
-            frame_roots = self.root_set_events[frame]
-            for root in frame_roots:
-                self.atropos_voting(root)
-
-    def forkless_cause(self, event_a, event_b):
-        if (
-            event_b.validator
-            in self.validator_cheater_list.get(event_a.validator, set())
-            and self.validator_cheater_times[event_a.validator][event_b.validator]
-            <= event_a.timestamp
-        ):
-            return False
+    def finalize_block(self, atropos):
+        # the walk stops at Events of earlier blocks, whose past cones are in blocks
+        # already, so it only visits the Events this block confirms
+        atropos.block = self.block
+        block_events = [atropos]
+        stack = [atropos]
+        while stack:
+            event = stack.pop()
+            for parent_id in event.parents:
+                parent = self.uuid_event_dict[parent_id]
+                if parent.block is None:
+                    parent.block = self.block
+                    block_events.append(parent)
+                    stack.append(parent)
+
+        if self.profiler is not None:
+            self.profiler.count("block_events", len(block_events))
+
+        block_events.sort(key=lambda event: (event.lamport, event.uuid))
+        return block_events
+
+    def prune_history(self):
+        # frames more than prune_horizon behind the frame to decide are dropped,
+        # but never a frame that a validator may still add roots to
+        cutoff = min(
+            self.frame_to_decide - self.prune_horizon,
+            self.frame_tracker.lowest(self.time),
+        )
+        if cutoff <= self.pruned_frame:
+            return
+        self.pruned_frame = cutoff
+
+        for frame in [f for f in self.root_set_events if f < cutoff]:
+            for root in self.root_set_events.pop(frame):
+                self.decided_roots.pop(root.uuid, None)
+            del self.root_set_validators[frame]
+            self.frame_root_weights.pop(frame, None)
+        for frame in [f for f in self.election_votes if f < cutoff]:
+            del self.election_votes[frame]
+        for frame in [f for f in self.quorum_cache if f < cutoff]:
+            del self.quorum_cache[frame]
+
+        # the Events themselves are compacted once their number has doubled since
+        # the last compaction, so every Event is moved a constant number of times
+        if len(self.events) >= 2 * self.compacted_events:
+            self.compact_events()
+
+    def compact_events(self):
+        # Events below the pruned frame are forgotten: they are removed from the
+        # parents of the remaining Events, and observations of them are reset, as
+        # if they had never been observed. Events that are not in a block yet are
+        # kept, so that a later block still confirms them
+        live = [
+            event
+            for event in self.events
+            if event.frame >= self.pruned_frame or event.block is None
+        ]
+        self.compacted_events = len(live)
+        if len(live) == len(self.events):
+            return
+
+        live_indices = np.array([event.index for event in live], dtype=np.int64)
+        # the extra last entry maps the index -1 of unobserved validators to itself
+        remap = np.full(len(self.events) + 1, -1, dtype=np.int32)
+        remap[live_indices] = np.arange(len(live), dtype=np.int32)
+
+        for clocks in (self.highest_observed, self.lowest_observing):
+            sequences = clocks.sequences[live_indices]
+            indices = remap[clocks.indices[live_indices]]
+            sequences[indices < 0] = 0
+            clocks.sequences = sequences
+            clocks.indices = indices
+        self.validator_visited_events = pack_bitset(
+            unpack_bitset(self.validator_visited_events, len(self.events))[
+                :, live_indices
+            ]
+        )
+        self.event_timestamps = self.event_timestamps[live_indices]
+        self.rebase_observed_sequences(live)
+        self.pruned_time = min(
+            (event.timestamp for event in live), default=self.pruned_time
+        )
 
-        a = {
-            validator: observed["sequence"]
-            for validator, observed in event_a.highest_observed.items()
+        pruned = {
+            event.uuid
+            for event in self.events
+            if event.frame < self.pruned_frame and event.block is not None
         }
-        b = event_b.lowest_observing
-
-        yes = 0
-        for validator, sequence in a.items():
-            if validator in b and b[validator]["sequence"] <= sequence:
-                uuid_a = event_a.highest_observed[validator]["uuid"]
-                uuid_b = event_b.lowest_observing[validator]["uuid"]
-
-                is_branch = uuid_a in self.validator_visited_events.get(
-                    event_a.validator, set()
-                ) and uuid_b in self.validator_visited_events.get(
-                    event_a.validator, set()
-                )
+        self.events = live
+        self.uuid_event_dict = {event.uuid: event for event in live}
+        self.event_ids = Interner()
+        for event in live:
+            event.index = self.event_ids.intern(event.uuid)
+            if not all(p in self.uuid_event_dict for p in event.parents):
+                event.parents = [p for p in event.parents if p in self.uuid_event_dict]
+            event.direct_parents = {
+                p for p in event.direct_parents if p in self.uuid_event_dict
+            }
+        # leaves also hold the Events of the timestamp being processed, which are
+        # not recorded yet, so only the pruned ones are removed
+        self.leaves -= pruned
+
+        for validator, chain in list(self.validator_events.items()):
+            kept = [
+                i
+                for i, event in enumerate(chain)
+                if event.uuid in self.uuid_event_dict
+            ]
+            if not kept:
+                del self.validator_events[validator]
+                del self.validator_sequences[validator]
+            elif len(kept) < len(chain):
+                sequences = self.validator_sequences[validator]
+                self.validator_events[validator] = [chain[i] for i in kept]
+                self.validator_sequences[validator] = [sequences[i] for i in kept]
+
+    def rebase_observed_sequences(self, live):
+        # the observed sequences of every validator start from the byte of its
+        # lowest live sequence, or of the last sequence observed of it if none of
+        # its Events are live, so the bytes of compacted sequences are dropped
+        # and the arrays stay as wide as the live sequence range
+        num_validators, width = self.observed_sequences.shape[1:]
+        if width == 0:
+            return
+        validator_ids = np.array([event.validator_id for event in live], dtype=np.int64)
+        positions = np.array(
+            [event.sequence >> 3 for event in live], dtype=np.int64
+        ) - self.observed_offsets[validator_ids]
+        lowest = np.full(num_validators, width, dtype=np.int64)
+        highest = np.full(num_validators, -1, dtype=np.int64)
+        np.minimum.at(lowest, validator_ids, positions)
+        np.maximum.at(highest, validator_ids, positions)
+
+        observed = self.observed_sequences.any(axis=0)
+        last = np.where(
+            observed.any(axis=1), width - 1 - np.argmax(observed[:, ::-1], axis=1), 0
+        )
+        shifts = np.maximum(np.minimum(lowest, last), 0)
+        sizes = np.maximum(last, highest) - shifts + 1
+
+        size = int(sizes.max())
+        rebased = np.zeros((num_validators, num_validators, size), dtype=np.uint8)
+        for validator_id in range(num_validators):
+            shift = shifts[validator_id]
+            kept = self.observed_sequences[:, validator_id, shift : shift + size]
+            rebased[:, validator_id, : kept.shape[1]] = kept
+        self.observed_sequences = rebased
+        self.observed_offsets = self.observed_offsets.copy()
+        self.observed_offsets[:num_validators] += shifts
+
+    def election_tally(self, frame, num_candidates):
+        tally = self.election_tallies.get(frame, np.zeros(0, dtype=np.int64))
+        tally = grow(tally, (num_candidates,), 0)
+        self.election_tallies[frame] = tally
+        return tally
+
+    def election_roots(self, frame, start, end):
+        # the roots of frame from position start on, and of the frames after it up
+        # to end, in the order of a pass over the frames
+        roots = list(self.root_set_events.get(frame, ())[start:])
+        for later in range(frame + 1, end):
+            roots.extend(self.root_set_events.get(later, ()))
+        return roots
 
-                no_forks = (
-                    event_a.validator not in self.validator_cheater_list
-                    or validator not in self.validator_cheater_list[event_a.validator]
-                    or (
-                        is_branch
-                        and self.uuid_event_dict[uuid_a].timestamp
-                        < self.validator_cheater_times[event_a.validator][validator]
-                        and self.uuid_event_dict[uuid_b].timestamp
-                        < self.validator_cheater_times[event_a.validator][validator]
-                    )
+    def process_known_roots(self):
+        # a root votes once on every candidate of the frame to decide, so only the
+        # roots queued by set_roots have work to do, unless the candidates changed
+        # and every root between the frame to decide and the highest frame votes
+        if self.election_pending:
+            self.election_pending = False
+            self.election_queue = self.election_roots(
+                self.frame_to_decide + 1, 0, self.frame
+            )
+        queue, self.election_queue = self.election_queue, []
+
+        position = 0
+        while position < len(queue):
+            root = queue[position]
+            position += 1
+            frame_to_decide = self.frame_to_decide
+            self.atropos_voting(root)
+            if self.frame_to_decide != frame_to_decide:
+                # the roots after this one vote on the next frame to decide in this
+                # pass already, and all of them again in the next one
+                queue = self.election_roots(
+                    root.frame,
+                    self.root_set_events[root.frame].index(root) + 1,
+                    self.frame,
                 )
+                position = 0
 
-                if is_branch and no_forks:
-                    yes += self.validator_weights[validator]
+    def forkless_cause(self, event_a, event_b):
+        return bool(self.forkless_cause_many(event_a, [event_b])[0])
+
+    def forkless_cause_many(self, event_a, events_b):
+        if self.profiler is not None:
+            self.profiler.count("forkless_cause_batches")
+            self.profiler.count("forkless_cause_pairs", len(events_b))
+
+        cheaters = self.validator_cheater_list.get(event_a.validator)
+        cheater_times = self.validator_cheater_times.get(event_a.validator)
+
+        # rows span the whole column capacity; unused columns hold sequence 0 and
+        # no stake, so they never count towards the quorum
+        highest_sequences = self.highest_observed.sequences[event_a.index]
+        highest_indices = self.highest_observed.indices[event_a.index]
+        rows = [event_b.index for event_b in events_b]
+        lowest_sequences = self.lowest_observing.sequences[rows]
+        lowest_indices = self.lowest_observing.indices[rows]
+        visited_events = self.validator_visited_events[event_a.validator_id]
+
+        is_branch = (
+            (lowest_sequences > 0)
+            & (lowest_sequences <= highest_sequences)
+            & test_bits(visited_events, highest_indices)
+            & test_bits(visited_events, lowest_indices)
+        )
 
-        return yes >= self.quorum(event_b.frame)
+        if cheaters:
+            cheater_ids = np.array(
+                [self.validator_ids.ids[cheater] for cheater in cheaters]
+            )
+            times = np.array([cheater_times[cheater] for cheater in cheaters])
+            is_branch[:, cheater_ids] &= (
+                self.event_timestamps[highest_indices[cheater_ids]] < times
+            ) & (self.event_timestamps[lowest_indices[:, cheater_ids]] < times)
+
+        yes = is_branch @ self.validator_stake
+
+        caused = np.zeros(len(events_b), dtype=bool)
+        for i, event_b in enumerate(events_b):
+            if (
+                cheaters
+                and event_b.validator in cheaters
+                and cheater_times[event_b.validator] <= event_a.timestamp
+            ):
+                continue
+            caused[i] = yes[i] >= self.quorum(event_b.frame)
+        return caused
 
     def detect_forks(self, event):
         if event.validator not in self.validator_cheater_list:
@@ -704,132 +1988,180 @@ class Lachesis:
         if event.validator not in self.validator_cheater_frames:
             self.validator_cheater_frames[event.validator] = {}
 
-        parents = deque(event.parents)
-
-        while parents:
-            parent_id = parents.popleft()
-            parent = self.uuid_event_dict[parent_id]
-
-            if event.validator not in parent.visited:
-                parent.visited[event.validator] = {
-                    "uuid": event.uuid,
-                    "sequence": event.sequence,
-                }
-
-                if event.validator not in self.validator_visited_events:
-                    self.validator_visited_events[event.validator] = set(
-                        str(event.uuid)
-                    )
-                self.validator_visited_events[event.validator].add((str(parent.uuid)))
-
-                if event.validator not in self.observed_sequences:
-                    self.observed_sequences[event.validator] = {}
-                if parent.validator not in self.observed_sequences[event.validator]:
-                    self.observed_sequences[event.validator][parent.validator] = set()
-
-                if (
-                    parent.sequence
-                    in self.observed_sequences[event.validator][parent.validator]
-                ):
-                    self.validator_cheater_list[event.validator].add(parent.validator)
-                    if (
-                        parent.validator
-                        not in self.validator_cheater_frames[event.validator]
-                    ):
-                        self.validator_cheater_frames[event.validator][
-                            parent.validator
-                        ] = (
-                            self.validator_highest_frame[event.validator]
-                            if event.validator in self.validator_highest_frame
-                            else 1
-                        )
-                    if event.validator not in self.validator_cheater_times:
-                        self.validator_cheater_times[event.validator] = {}
-                    if (
-                        parent.validator
-                        not in self.validator_cheater_times[event.validator]
-                    ):
-                        self.validator_cheater_times[event.validator][
-                            parent.validator
-                        ] = event.timestamp
-                    self.suspected_cheaters.add(parent.validator)
-                else:
-                    self.observed_sequences[event.validator][parent.validator].add(
-                        parent.sequence
-                    )
-                parents.extend(parent.parents)
-
-    def set_highest_events_observed(self, event):
+        # events are marked as visited when first reached, so every event enters
+        # the observer's past cone, and sets its (validator, sequence) bit, exactly
+        # once; the bitsets are read and written through memoryviews, which index
+        # faster than numpy arrays
+        visited_events = memoryview(self.validator_visited_events[event.validator_id])
+        observed_sequences = memoryview(self.observed_sequences[event.validator_id])
+        observed_offsets = memoryview(self.observed_offsets)
+        new_events = []
+        visits = 0
         for parent_id in event.parents:
             parent = self.uuid_event_dict[parent_id]
+            index = parent.index
+            if not visited_events[index >> 3] & (1 << (index & 7)):
+                visited_events[index >> 3] |= 1 << (index & 7)
+                new_events.append(parent)
+
+        while new_events:
+            parent = new_events.pop()
+            visits += 1
+
+            # sequences below the offset of their validator belong to compacted
+            # Events, whose observations have been dropped
+            sequence = parent.sequence
+            position = (sequence >> 3) - observed_offsets[parent.validator_id]
+            if position >= 0:
+                key = (parent.validator_id, position)
+                if observed_sequences[key] & (1 << (sequence & 7)):
+                    self.record_fork(event, parent)
+                else:
+                    observed_sequences[key] |= 1 << (sequence & 7)
+
+            for grandparent_id in parent.parents:
+                grandparent = self.uuid_event_dict[grandparent_id]
+                index = grandparent.index
+                if not visited_events[index >> 3] & (1 << (index & 7)):
+                    visited_events[index >> 3] |= 1 << (index & 7)
+                    new_events.append(grandparent)
+
+        if self.profiler is not None:
+            self.profiler.count("detect_forks_visits", visits)
+
+    def suspect_cheater(self, observer, cheater, frame):
+        self.suspected_cheaters.add(cheater)
+        if cheater not in self.cheater_deactivation_frames:
+            self.unconfirmed_cheaters.add(cheater)
+        cheater_frames = self.validator_cheater_frames.setdefault(observer, {})
+        if cheater in cheater_frames:
+            return
+        cheater_frames[cheater] = frame
+        # the observer counts towards the cheater from frame + 2 on, i.e. once the
+        # ledger has applied frame + 1
+        self.observer_frames.setdefault(frame + 1, []).append((cheater, observer))
+        if frame < self.ledger_frame and observer in self.active_validators:
+            self.observer_stake[cheater] = (
+                self.observer_stake.get(cheater, 0) + self.active_validators[observer]
+            )
 
-            if (
-                parent.validator not in event.highest_observed
-                or parent.sequence
-                > event.highest_observed[parent.validator]["sequence"]
-                or (
-                    parent.validator in event.highest_observed
-                    and parent.sequence
-                    == event.highest_observed[parent.validator]["sequence"]
-                    and parent.uuid < event.highest_observed[parent.validator]["uuid"]
-                )
-            ):
-                event.highest_observed[parent.validator] = {
-                    "uuid": parent.uuid,
-                    "sequence": parent.sequence,
-                }
+    def record_fork(self, event, parent):
+        self.validator_cheater_list[event.validator].add(parent.validator)
+        self.suspect_cheater(
+            event.validator,
+            parent.validator,
+            self.validator_highest_frame.get(event.validator, 1),
+        )
+        if event.validator not in self.validator_cheater_times:
+            self.validator_cheater_times[event.validator] = {}
+        if parent.validator not in self.validator_cheater_times[event.validator]:
+            self.validator_cheater_times[event.validator][
+                parent.validator
+            ] = event.timestamp
 
-            for validator, observed in parent.highest_observed.items():
+    def set_highest_events_observed(self, event):
+        if not event.parents:
+            return
+
+        # candidates are taken in the order a sequential merge would visit them:
+        # each parent itself, followed by everything that parent observes
+        width = len(self.validator_ids)
+        parents = [self.uuid_event_dict[parent_id] for parent_id in event.parents]
+        parent_indices = [parent.index for parent in parents]
+        parent_rows = np.arange(0, 2 * len(parents), 2)
+
+        sequences = np.zeros((2 * len(parents), width), dtype=np.int32)
+        indices = np.full((2 * len(parents), width), -1, dtype=np.int32)
+        sequences[1::2] = self.highest_observed.sequences[parent_indices, :width]
+        indices[1::2] = self.highest_observed.indices[parent_indices, :width]
+        own_columns = [parent.validator_id for parent in parents]
+        sequences[parent_rows, own_columns] = [parent.sequence for parent in parents]
+        indices[parent_rows, own_columns] = parent_indices
+
+        highest = sequences.max(axis=0)
+        is_highest = (sequences == highest) & (highest > 0)
+        first = indices[is_highest.argmax(axis=0), np.arange(width)]
+        highest_indices = np.where(highest > 0, first, -1)
+
+        # different events with the same highest sequence (forks) are resolved
+        # by replaying the sequential merge, where a parent with a smaller UUID
+        # replaces the current event on a tie
+        for validator_id in np.flatnonzero((is_highest & (indices != first)).any(axis=0)):
+            current = None
+            for row in range(len(sequences)):
+                sequence = sequences[row, validator_id]
+                if sequence == 0:
+                    continue
+                parent = parents[row // 2]
                 if (
-                    validator not in event.highest_observed
-                    or observed["sequence"]
-                    > event.highest_observed[validator]["sequence"]
+                    current is None
+                    or sequence > current[1]
                     or (
-                        validator in event.highest_observed
-                        and observed["sequence"]
-                        == event.highest_observed[validator]["sequence"]
-                        and parent.uuid < event.highest_observed[validator]["uuid"]
+                        sequence == current[1]
+                        and parent.uuid < self.events[current[0]].uuid
                     )
                 ):
-                    event.highest_observed[validator] = observed.copy()
+                    current = (indices[row, validator_id], sequence)
+            highest_indices[validator_id] = current[0]
+
+        self.highest_observed.sequences[event.index, :width] = highest
+        self.highest_observed.indices[event.index, :width] = highest_indices
+
+    def observes_lower(self, event, current_sequence, current_index):
+        # an ancestor is only re-observed by a lower sequence, or by a smaller UUID
+        # on a sequence tie, of the same timestamp as the event observing it
+        return current_sequence == 0 or (
+            self.event_timestamps[current_index] == event.timestamp
+            and (
+                current_sequence > event.sequence
+                or (
+                    current_sequence == event.sequence
+                    and current_index != event.index
+                    and event.uuid < self.events[current_index].uuid
+                )
+            )
+        )
 
     def set_lowest_observing_events(self, event):
+        lowest_sequences = self.lowest_observing.sequences
+        lowest_indices = self.lowest_observing.indices
+        cheaters = self.validator_cheater_list.get(event.validator, set())
+        cheater_times = self.validator_cheater_times.get(event.validator)
+
+        # the walk stops at ancestors that already hold an equal or lower
+        # observation, since everything behind them was observed at the same time
+        reached = set(event.parents)
         parents = deque(event.parents)
+        visits = 0
 
         while parents:
-            parent_id = parents.popleft()
-            parent = self.uuid_event_dict[parent_id]
+            parent = self.uuid_event_dict[parents.popleft()]
+            visits += 1
 
-            if event.validator not in parent.lowest_observing or (
-                parent.lowest_observing[event.validator]["sequence"] > event.sequence
-                and self.uuid_event_dict[
-                    parent.lowest_observing[event.validator]["uuid"]
-                ].timestamp
-                == event.timestamp
-                or (
-                    parent.lowest_observing[event.validator]["sequence"]
-                    == event.sequence
-                    and event.uuid < parent.lowest_observing[event.validator]["uuid"]
-                    and self.uuid_event_dict[
-                        parent.lowest_observing[event.validator]["uuid"]
-                    ].timestamp
-                    == event.timestamp
-                )
+            if not self.observes_lower(
+                event,
+                lowest_sequences[parent.index, event.validator_id],
+                lowest_indices[parent.index, event.validator_id],
             ):
-                parent.lowest_observing[event.validator] = {
-                    "uuid": event.uuid,
-                    "sequence": event.sequence,
-                }
+                continue
 
-                if (
-                    event.validator in self.validator_cheater_list
-                    and parent.validator in self.validator_cheater_list[event.validator]
-                    and self.time
-                    >= self.validator_cheater_times[event.validator][parent.validator]
-                ):
-                    continue
+            lowest_sequences[parent.index, event.validator_id] = event.sequence
+            lowest_indices[parent.index, event.validator_id] = event.index
+
+            if (
+                parent.validator in cheaters
+                and self.time >= cheater_times[parent.validator]
+            ):
+                continue
+
+            for grandparent_id in parent.parents:
+                if grandparent_id not in reached:
+                    reached.add(grandparent_id)
+                    parents.append(grandparent_id)
 
-                parents.extend(parent.parents)
+        if self.profiler is not None:
+            self.profiler.count("lowest_observing_visits", visits)
+            self.profiler.record("lowest_observing_visits", visits)
 
     def process_events(self, events):
         timestamp_event_dict = {}
@@ -838,29 +2170,11 @@ class Lachesis:
                 timestamp_event_dict[event.timestamp] = []
             timestamp_event_dict[event.timestamp].append(event)
 
-        max_timestamp = max(timestamp_event_dict.keys())
-        min_timestamp = min(timestamp_event_dict.keys())
-
-        for timestamp in range(min_timestamp, max_timestamp + 1):
-            self.time = timestamp
-            frames = []
-            for v in self.validators:
-                if (
-                    v not in self.deactivation_time
-                    or self.time <= self.deactivation_time[v]
-                ):
-                    # one of the initial validators has not appeared, initialize as 1
-                    if (
-                        v not in self.validator_highest_frame
-                        and v not in self.activation_queue
-                    ):
-                        frames.append(1)
-                    # all other validators must be present (latent validators must first appear)
-                    # to account for their frames
-                    elif v in self.validator_highest_frame:
-                        frames.append(self.validator_highest_frame[v])
-
-            min_frame = min(frames) if len(frames) > 0 else 1
+        for timestamp in sorted(timestamp_event_dict):
+            # Events released late by ingest carry older timestamps, which must
+            # not move the clock back
+            self.time = max(self.time, timestamp)
+            min_frame = self.frame_tracker.lowest(self.time)
 
             if min_frame > self.minimum_frame:
                 self.minimum_frame = min_frame
@@ -868,7 +2182,7 @@ class Lachesis:
             if self.frame > self.maximum_frame:
                 self.maximum_frame = self.frame
 
-            current_timestamp_events = timestamp_event_dict.get(timestamp, [])
+            current_timestamp_events = timestamp_event_dict[timestamp]
 
             current_timestamp_events.sort(key=lambda e: (-e.sequence, e.uuid))
 
@@ -879,37 +2193,42 @@ class Lachesis:
                             self.uuid_event_dict[str(parent)].validator
                             == event.validator
                         ):
+                            if event.direct_parents is _no_direct_parents:
+                                event.direct_parents = set()
                             event.direct_parents.add(str(parent))
                             if parent in self.leaves:
                                 self.leaves.remove(str(parent))
                 self.leaves.add(str(event.uuid))
 
                 if event.last_event and event.validator not in self.deactivation_queue:
-                    self.deactivation_queue[event.validator] = self.maximum_frame + 2
+                    self.queue_deactivation(event.validator, self.maximum_frame + 2)
 
                 if event.last_event and event.validator not in self.deactivation_time:
-                    self.deactivation_time[event.validator] = event.timestamp
+                    self.set_deactivation_time(event.validator, event.timestamp)
 
                 if (
-                    event.validator not in self.validators
+                    event.validator not in self.frame_tracker.frames
                     and event.timestamp <= field_of_view
                 ):
-                    self.validators.append(event.validator)
-                    self.validator_weights[event.validator] = event.weight
+                    self.activate_validator(event.validator, event.weight)
 
                 if (
-                    event.validator not in self.validators
+                    event.validator not in self.frame_tracker.frames
                     and self.time > field_of_view
                     and event.validator not in self.activation_queue
                 ):
-                    self.activation_queue[event.validator] = (
-                        self.maximum_frame + 1,
-                        event.weight,
+                    self.queue_activation(
+                        event.validator, self.maximum_frame + 1, event.weight
                     )
                     continue
 
             for event in current_timestamp_events:
-                event.parents = [p for p in event.parents if p in self.uuid_event_dict]
+                # the parent list is shared with the other instances, so it is only
+                # replaced, never filtered in place, and kept when nothing is missing
+                if not all(p in self.uuid_event_dict for p in event.parents):
+                    event.parents = [
+                        p for p in event.parents if p in self.uuid_event_dict
+                    ]
 
                 if (
                     event.validator not in self.validator_highest_frame
@@ -931,130 +2250,211 @@ class Lachesis:
                         ):
                             event.sequence = self.uuid_event_dict[p].sequence + 1
 
-                self.detect_forks(event)
-                self.set_highest_events_observed(event)
-                self.set_lowest_observing_events(event)
-                self.set_roots(event)
-                self.events.append(event)
-                self.uuid_event_dict[event.uuid] = event
-                self.process_known_roots()
-
-    def graph_results(self, output_filename):
-        colors = ["orange", "yellow", "cyan", "blue", "purple"]
-        green = mcolors.to_rgb("green")
-        greens = [
-            tuple(g * 0.7 for g in green),
-            tuple(g * 0.8 for g in green),
-            tuple(g * 0.9 for g in green),
-            green,
-        ]
-        greens = [mcolors.to_hex(g) for g in greens]
-
-        colors_rgb = [mcolors.to_rgb(color) for color in colors]
+                if self.profiler is None:
+                    self.add_event_index(event)
+                    self.detect_forks(event)
+                    self.set_highest_events_observed(event)
+                    self.set_lowest_observing_events(event)
+                    self.set_roots(event)
+                    self.record_event(event)
+                    self.process_known_roots()
+                else:
+                    for phase in self.event_phases:
+                        self.profiler.run_phase(phase, getattr(self, phase), event)
+                    self.profiler.run_phase(
+                        "process_known_roots", self.process_known_roots
+                    )
 
-        darker_colors = []
-        for color in colors_rgb:
-            darker_color = tuple(c * 0.8 for c in color)
-            darker_colors.append(mcolors.to_hex(darker_color))
+    def record_event(self, event):
+        self.events.append(event)
+        self.uuid_event_dict[event.uuid] = event
+        self.add_to_chain(event)
 
-        timestamp_dag = nx.DiGraph()
+    def ingest(self, event):
+        self.ingest_many([event])
 
-        for event in self.events:
-            if event.validator in self.suspected_cheaters:
+    def ingest_many(self, events):
+        batch = []
+        for event in events:
+            if batch and event.timestamp != batch[-1].timestamp:
+                self.process_ready_events(batch)
+                batch = []
+            batch.append(event)
+        if batch:
+            self.process_ready_events(batch)
+
+    def process_ready_events(self, events):
+        ready = []
+        for event in events:
+            if (
+                event.uuid in self.uuid_event_dict
+                or event.uuid in self.pending_events
+                or event.uuid in self.skipped_events
+            ):
                 continue
-            validator = event.validator
-            timestamp = event.timestamp
-            sequence = event.sequence
-            frame = event.frame
-            weight = self.validator_weights[validator]
-            root = event.root
-            atropos = event.atropos
-            timestamp_dag.add_node(
-                (validator, timestamp),
-                seq=sequence,
-                frame=frame,
-                weight=weight,
-                root=root,
-                atropos=atropos,
-            )
-            for parent_uuid in event.parents:
-                parent = self.uuid_event_dict[parent_uuid]
-                if parent.validator in self.suspected_cheaters:
-                    continue
-                parent_timestamp = parent.timestamp
-                timestamp_dag.add_edge(
-                    (validator, timestamp),
-                    (parent.validator, parent_timestamp),
-                )
 
-        color_map = {}
-        for node in timestamp_dag:
-            frame = timestamp_dag.nodes[node]["frame"]
-            root = timestamp_dag.nodes[node]["root"]
-            atropos = timestamp_dag.nodes[node]["atropos"]
-            color_index = frame % len(colors)
-            color_map[node] = (
-                greens[frame % len(greens)]
-                if atropos
-                else (darker_colors[color_index] if root else colors[color_index])
-            )
-
-        pos = {}
-        num_nodes = len(self.validator_weights)
-        num_levels = max([event.timestamp for event in self.events])
-
-        figsize = [20, 10]
-        if num_levels >= 15:
-            figsize[0] = figsize[0] * num_levels / 20
-        if num_nodes >= 10:
-            figsize[0] = figsize[0] * num_nodes / 4
-            figsize[1] = figsize[1] * num_nodes / 10
-
-        fig = plt.figure(figsize=(figsize[0], figsize[1]))
-        for i in range(num_nodes + 25):
-            for j in range(num_levels + 25):
-                node = (chr(i + 65), j)
-                pos[node] = (j, i)
-
-        labels = {
-            node: (
-                node[0],
-                node[1],
-                timestamp_dag.nodes[node]["seq"],
-                timestamp_dag.nodes[node]["weight"],
-            )
-            for node in timestamp_dag.nodes
-        }
+            missing_parents = {
+                p
+                for p in event.parents
+                if p not in self.uuid_event_dict and p not in self.skipped_events
+            }
+            if not missing_parents:
+                ready.append(event)
+                continue
 
-        nx.draw(
-            timestamp_dag,
-            pos,
-            with_labels=True,
-            labels={
-                val: r"$\mathrm{{{}}}_{{{},{},{}}}$".format(
-                    labels[val][0], labels[val][1], labels[val][2], labels[val][3]
+            self.pending_events[event.uuid] = event
+            self.pending_parents[event.uuid] = missing_parents
+            for parent_uuid in missing_parents:
+                self.pending_children.setdefault(parent_uuid, []).append(event.uuid)
+
+        self.process_released_events(ready)
+
+        # an Event is never processed without its parents, which would change the
+        # DAG, so the oldest pending Events are evicted instead and reported
+        evicted = []
+        while len(self.pending_events) > self.max_pending:
+            oldest_uuid = next(iter(self.pending_events))
+            missing_parents = self.pending_parents[oldest_uuid]
+            evicted.append((self.release_pending_event(oldest_uuid), missing_parents))
+        if evicted:
+            if self.profiler is not None:
+                self.profiler.count("evicted_events", len(evicted))
+            if self.on_evict is None:
+                raise RuntimeError(
+                    f"{len(evicted)} pending Events evicted, the first one "
+                    f"{evicted[0][0].uuid} is missing {sorted(evicted[0][1])}"
                 )
-                for val in labels
-            },
-            font_family="serif",
-            font_size=9,
-            node_size=1300,
-            node_color=[color_map[node] for node in timestamp_dag.nodes],
-            font_weight="bold",
+            for event, missing_parents in evicted:
+                self.on_evict(event, missing_parents)
+
+    def process_released_events(self, ready):
+        while ready:
+            self.process_events(ready)
+
+            released = []
+            for event in ready:
+                if event.uuid not in self.uuid_event_dict:
+                    self.skipped_events.add(event.uuid)
+                for child_uuid in self.pending_children.pop(event.uuid, []):
+                    missing_parents = self.pending_parents.get(child_uuid)
+                    if missing_parents is None:
+                        continue
+                    missing_parents.discard(event.uuid)
+                    if not missing_parents:
+                        released.append(self.release_pending_event(child_uuid))
+            ready = released
+
+    def release_pending_event(self, event_uuid):
+        for parent_uuid in self.pending_parents.pop(event_uuid):
+            children = self.pending_children.get(parent_uuid)
+            if children is not None and event_uuid in children:
+                children.remove(event_uuid)
+                if not children:
+                    del self.pending_children[parent_uuid]
+        return self.pending_events.pop(event_uuid)
+
+    def flush_pending(self):
+        # the flushed Events are processed without the parents that are still
+        # missing, which are returned for the caller to report
+        missing = {
+            event_uuid: set(missing_parents)
+            for event_uuid, missing_parents in self.pending_parents.items()
+        }
+        self.process_released_events(
+            [
+                self.release_pending_event(event_uuid)
+                for event_uuid in list(self.pending_events)
+            ]
         )
+        dropped_parents = {}
+        for event_uuid, missing_parents in missing.items():
+            missing_parents.difference_update(self.uuid_event_dict)
+            if missing_parents:
+                dropped_parents[event_uuid] = missing_parents
+        return dropped_parents
+
+    def graph_results(self, output_filename, timestamps=None, frames=None, dpi=None):
+        return render_dag(
+            dag_snapshot(self, timestamps, frames), output_filename, dpi
+        )
+
+    def run_lachesis(
+        self, input_filename, output_filename, graph_results=False, stream=False
+    ):
+        if stream:
+            event_stream = stream_data(input_filename)
+            # only the first field_of_view time steps are needed to know the
+            # initial validators, the rest of the stream is ingested as it is read
+            event_list = []
+            for event in event_stream:
+                event_list.append(event)
+                if event.timestamp > field_of_view:
+                    break
+            validators, validator_weights = filter_validators_and_weights(event_list)
+
+            self.initialize_validators(validators, validator_weights)
+            self.ingest_many(itertools.chain(event_list, event_stream))
+            self.flush_pending()
+        else:
+            self.run_events(load_data(input_filename))
 
-        fig.savefig(output_filename, format="pdf", dpi=300, bbox_inches="tight")
-        plt.close()
+        if graph_results:
+            self.graph_results(output_filename)
 
-    def run_lachesis(self, input_filename, output_filename, graph_results=False):
-        event_list = parse_data(input_filename)
+    def run_events(self, event_list):
         validators, validator_weights = filter_validators_and_weights(event_list)
 
         self.initialize_validators(validators, validator_weights)
         self.process_events(event_list)
 
-        if graph_results:
-            self.graph_results(output_filename)
+
+class LachesisPipeline:
+    # parses a DAG once for both the single instance run and the multi-instance
+    # run, which also reuses the single instance run as its reference
+    def __init__(self, file_path, profiler=None):
+        self.file_path = file_path
+        self.profiler = profiler
+        self.parsed_events = load_data(file_path)
+        self.uuid_validator_map = {
+            event.uuid: event.validator for event in self.parsed_events
+        }
+        self.validators, self.validator_weights = filter_validators_and_weights(
+            self.parsed_events
+        )
+        self.reference = None
+
+    def events(self):
+        return [event.share() for event in self.parsed_events]
+
+    def reference_run(
+        self, output_filename=None, graph_results=False, renderer=None, key=None
+    ):
+        if self.reference is None:
+            self.reference = Lachesis(profiler=self.profiler)
+            self.reference.run_events(self.events())
+        if graph_results and renderer is not None:
+            renderer.submit(self.reference, output_filename, key=key)
+        elif graph_results:
+            self.reference.graph_results(output_filename)
+        return self.reference
+
+    def run_multi_instance(
+        self,
+        lachesis_multi_instance,
+        output_folder,
+        graph_results=False,
+        renderer=None,
+        key=None,
+    ):
+        lachesis_multi_instance.run_lachesis_multiinstance(
+            self.file_path,
+            output_folder,
+            graph_results,
+            pipeline=self,
+            renderer=renderer,
+            key=key,
+        )
+        return lachesis_multi_instance
 
 
 if __name__ == "__main__":
@@ -0,0 +1,275 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib.colors as mcolors
+import matplotlib.pyplot as plt
+import networkx as nx
+
+colors = ["orange", "yellow", "cyan", "blue", "purple"]
+default_dpi = {"pdf": 300, "svg": 72, "png": 100}
+# laying out mathtext labels and arrow heads costs far more than drawing them, so
+# only the PDF output has them, the quick SVG and PNG outputs use plain text and
+# plain lines (edges always point back in time, to the parent)
+typeset_formats = {"pdf"}
+# the figure grows with the DAG, so raster output is capped at this many pixels
+# along its longest side by lowering the resolution
+max_raster_size = 8192
+
+
+def frame_colors():
+    green = mcolors.to_rgb("green")
+    greens = [
+        tuple(g * 0.7 for g in green),
+        tuple(g * 0.8 for g in green),
+        tuple(g * 0.9 for g in green),
+        green,
+    ]
+    greens = [mcolors.to_hex(g) for g in greens]
+
+    darker_colors = []
+    for color in colors:
+        darker_color = tuple(c * 0.8 for c in mcolors.to_rgb(color))
+        darker_colors.append(mcolors.to_hex(darker_color))
+
+    return greens, darker_colors
+
+
+def in_window(value, window):
+    return window is None or window[0] <= value <= window[1]
+
+
+def dag_snapshot(lachesis, timestamps=None, frames=None):
+    # everything the drawing needs, as plain tuples that can be sent to another
+    # process, restricted to the events inside the timestamp and frame windows
+    nodes = {}
+    for event in lachesis.events:
+        if event.validator in lachesis.suspected_cheaters:
+            continue
+        if not in_window(event.timestamp, timestamps) or not in_window(
+            event.frame, frames
+        ):
+            continue
+        nodes[event.uuid] = (
+            (event.validator, event.timestamp),
+            event.sequence,
+            event.frame,
+            lachesis.validator_weights[event.validator],
+            event.root,
+            event.atropos,
+        )
+
+    edges = []
+    for event in lachesis.events:
+        if event.uuid not in nodes:
+            continue
+        for parent_uuid in event.parents:
+            if parent_uuid in nodes:
+                edges.append((nodes[event.uuid][0], nodes[parent_uuid][0]))
+
+    if timestamps is None and frames is None:
+        num_levels = max(event.timestamp for event in lachesis.events)
+    elif nodes:
+        drawn_timestamps = [node[0][1] for node in nodes.values()]
+        num_levels = max(drawn_timestamps) - min(drawn_timestamps)
+    else:
+        num_levels = 0
+
+    return {
+        "nodes": list(nodes.values()),
+        "edges": edges,
+        "num_validators": len(lachesis.validator_weights),
+        "num_levels": num_levels,
+    }
+
+
+def validator_rows(validators):
+    # single letter validators keep their place in the alphabet, so that graphs
+    # of the same DAG line up; any other names are laid out in sorted order
+    if all(len(validator) == 1 for validator in validators):
+        return {validator: ord(validator) - 65 for validator in validators}
+    return {validator: i for i, validator in enumerate(sorted(validators))}
+
+
+def render_dag(snapshot, output_filename, dpi=None):
+    greens, darker_colors = frame_colors()
+    output_format = os.path.splitext(output_filename)[1][1:].lower() or "pdf"
+
+    timestamp_dag = nx.DiGraph()
+    for node, sequence, frame, weight, root, atropos in snapshot["nodes"]:
+        timestamp_dag.add_node(
+            node, seq=sequence, frame=frame, weight=weight, root=root, atropos=atropos
+        )
+    timestamp_dag.add_edges_from(snapshot["edges"])
+
+    if not timestamp_dag:
+        return None
+
+    color_map = {}
+    for node in timestamp_dag:
+        frame = timestamp_dag.nodes[node]["frame"]
+        root = timestamp_dag.nodes[node]["root"]
+        atropos = timestamp_dag.nodes[node]["atropos"]
+        color_index = frame % len(colors)
+        color_map[node] = (
+            greens[frame % len(greens)]
+            if atropos
+            else (darker_colors[color_index] if root else colors[color_index])
+        )
+
+    rows = validator_rows({node[0] for node in timestamp_dag})
+    pos = {node: (node[1], rows[node[0]]) for node in timestamp_dag}
+
+    num_nodes = snapshot["num_validators"]
+    num_levels = snapshot["num_levels"]
+
+    figsize = [20, 10]
+    if num_levels >= 15:
+        figsize[0] = figsize[0] * num_levels / 20
+    if num_nodes >= 10:
+        figsize[0] = figsize[0] * num_nodes / 4
+        figsize[1] = figsize[1] * num_nodes / 10
+
+    fig = plt.figure(figsize=(figsize[0], figsize[1]))
+
+    labels = {
+        node: (
+            node[0],
+            node[1],
+            timestamp_dag.nodes[node]["seq"],
+            timestamp_dag.nodes[node]["weight"],
+        )
+        for node in timestamp_dag.nodes
+    }
+
+    if output_format in typeset_formats:
+        label_format = r"$\mathrm{{{}}}_{{{},{},{}}}$"
+    else:
+        label_format = "{}\n{},{},{}"
+
+    nx.draw(
+        timestamp_dag,
+        pos,
+        with_labels=True,
+        labels={
+            val: label_format.format(
+                labels[val][0], labels[val][1], labels[val][2], labels[val][3]
+            )
+            for val in labels
+        },
+        font_family="serif",
+        font_size=9,
+        node_size=1300,
+        node_color=[color_map[node] for node in timestamp_dag.nodes],
+        font_weight="bold",
+        arrows=output_format in typeset_formats,
+    )
+
+    if dpi is None:
+        dpi = default_dpi.get(output_format, 100)
+        if output_format not in ("pdf", "svg"):
+            dpi = min(dpi, max_raster_size / max(figsize))
+
+    fig.savefig(
+        output_filename,
+        format=output_format,
+        dpi=dpi,
+        bbox_inches="tight" if output_format in typeset_formats else None,
+    )
+    plt.close(fig)
+    return output_filename
+
+
+class Renderer:
+    def __init__(self, workers=1, max_pending=None):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        # every queued snapshot holds a copy of its DAG, so submit blocks on the
+        # oldest one once this many are waiting to be drawn
+        self.max_pending = max_pending or 2 * workers
+        self.pending = deque()
+        self.rendered = []
+        self.errors = {}
+
+    def submit(
+        self,
+        lachesis,
+        output_filename,
+        timestamps=None,
+        frames=None,
+        dpi=None,
+        key=None,
+    ):
+        # the snapshot is taken right away, only the drawing runs in the background,
+        # and a failure is recorded under key
+        while len(self.pending) >= self.max_pending:
+            self.collect(*self.pending.popleft())
+        snapshot = dag_snapshot(lachesis, timestamps, frames)
+        self.pending.append(
+            (key, self.executor.submit(render_dag, snapshot, output_filename, dpi))
+        )
+
+    def collect(self, key, future):
+        # a failed drawing is recorded under the key it was submitted with, the
+        # first error of a key is kept
+        try:
+            output_filename = future.result()
+        except Exception as e:
+            self.errors.setdefault(key, str(e))
+            return
+        if output_filename:
+            self.rendered.append(output_filename)
+
+    def wait(self):
+        while self.pending:
+            self.collect(*self.pending.popleft())
+        rendered = self.rendered
+        self.rendered = []
+        return rendered
+
+    def close(self):
+        rendered = self.wait()
+        self.executor.shutdown()
+        return rendered
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    from lachesis import Lachesis
+
+    parser = argparse.ArgumentParser(
+        description="Run Lachesis on a DAG file and render the result"
+    )
+    parser.add_argument("input_file", help="the .txt or binary DAG file")
+    parser.add_argument(
+        "output_file",
+        help="the file to render to, as a PDF, SVG or PNG depending on its extension",
+    )
+    parser.add_argument(
+        "--timestamps",
+        type=int,
+        nargs=2,
+        metavar=("FIRST", "LAST"),
+        help="only draw the events in this range of timestamps",
+    )
+    parser.add_argument(
+        "--frames",
+        type=int,
+        nargs=2,
+        metavar=("FIRST", "LAST"),
+        help="only draw the events in this range of frames",
+    )
+    parser.add_argument("--dpi", type=int, default=None, help="resolution of the output")
+    args = parser.parse_args()
+
+    lachesis_state = Lachesis()
+    lachesis_state.run_lachesis(args.input_file, None, False)
+    render_dag(
+        dag_snapshot(lachesis_state, args.timestamps, args.frames),
+        args.output_file,
+        args.dpi,
+    )
@@ -1,5 +1,7 @@
+import argparse
+import os
 from tqdm import tqdm
-from graph import generate_graphs
+from graph import generate_graphs, verify_graphs
 
 parameters_list = [
     ("y", "20", "0", "20", "4", "0.65", "0.4", "0.5", "./graphs", "1"),
@@ -10,24 +12,73 @@ parameters_list = [
     ("y", "960", "0.3", "r", "r", "r", "r", "r", "./cheaters", "41"),
 ]
 
-total_graphs = sum([int(p[1]) for p in parameters_list])
-
-print()
-print("automating graphing...")
-print()
-
-with tqdm(total=total_graphs, desc="Progress", unit="graph") as progress_bar:
-    for parameters in parameters_list:
-        generate_graphs(
-            parameters[0],
-            parameters[1],
-            parameters[2],
-            parameters[3],
-            parameters[4],
-            parameters[5],
-            parameters[6],
-            parameters[7],
-            parameters[8],
-            parameters[9],
-        )
-        progress_bar.update(int(parameters[1]))
+
+def automate_graphing(seed=None, workers=1, plot=True):
+    total_graphs = sum([int(p[1]) for p in parameters_list])
+
+    print()
+    print("automating graphing...")
+    print()
+
+    with tqdm(total=total_graphs, desc="Progress", unit="graph") as progress_bar:
+        for parameters in parameters_list:
+            # every run of the list shares one base seed, recorded in the manifests
+            seed = generate_graphs(
+                *parameters,
+                seed=seed,
+                workers=workers,
+                plot=plot,
+                progress=progress_bar,
+            )
+
+    return seed
+
+
+def verify_corpus(workers=1):
+    base_dirs = sorted({parameters[8] for parameters in parameters_list})
+    mismatches = []
+    for base_dir in base_dirs:
+        with tqdm(desc=f"Verifying {base_dir}", unit="graph") as progress_bar:
+            mismatches += [
+                os.path.join(base_dir, graph)
+                for graph in verify_graphs(base_dir, workers, progress_bar)
+            ]
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate the test DAGs of parameters_list"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of processes generating graphs (Default: one per CPU)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="base seed of the graphs (Default: a random seed, printed and recorded)",
+    )
+    parser.add_argument(
+        "--text-only",
+        action="store_true",
+        help="only write the text files and skip plotting the graphs",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="regenerate the graphs of the manifests and compare them byte for byte",
+    )
+    args = parser.parse_args()
+
+    if args.verify:
+        mismatches = verify_corpus(args.workers)
+        for graph in mismatches:
+            print(f"mismatch: {graph}")
+        print(f"{len(mismatches)} mismatched graphs")
+    else:
+        seed = automate_graphing(args.seed, args.workers, not args.text_only)
+        print(f"seed: {seed}")
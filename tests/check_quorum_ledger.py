@@ -0,0 +1,216 @@
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "PyLachesis")
+)
+from lachesis import Lachesis
+
+
+def new_ledger(weights):
+    lachesis = Lachesis()
+    lachesis.initialize_validators(list(weights), weights)
+    return lachesis
+
+
+class BaselineLedger:
+    # the quorum of the original implementation, which recomputes every sum on a
+    # cache miss, for quorums computed in increasing frame order and queue changes
+    # that only take effect after the last computed frame
+    def __init__(self, weights):
+        self.validators = list(weights)
+        self.validator_weights = dict(weights)
+        self.activation_queue = {}
+        self.deactivation_queue = {}
+        self.deactivated_validators = set()
+        self.deactivated_cheaters = set()
+        self.suspected_cheaters = set()
+        self.validator_cheater_frames = {}
+        self.quorum_cache = {}
+
+    def quorum(self, frame):
+        if frame in self.quorum_cache:
+            return self.quorum_cache[frame]
+
+        deactivated_cheaters = self.deactivated_cheaters.copy()
+        deactivated_validators = self.deactivated_validators.copy()
+
+        for v in self.deactivation_queue:
+            if frame >= self.deactivation_queue[v]:
+                self.deactivated_validators.add(v)
+
+        active_validators = [
+            v
+            for v in self.validators
+            if (v not in deactivated_cheaters) and (v not in deactivated_validators)
+        ]
+
+        for s in self.suspected_cheaters:
+            if s not in deactivated_cheaters:
+                observed_weight = 0
+                for v in active_validators:
+                    if (
+                        v in self.validator_cheater_frames
+                        and s in self.validator_cheater_frames[v]
+                    ):
+                        if self.validator_cheater_frames[v][s] < frame - 1:
+                            observed_weight += self.validator_weights[v]
+                if (
+                    observed_weight
+                    >= 2
+                    * sum([self.validator_weights[v] for v in active_validators])
+                    // 3
+                    + 1
+                ):
+                    self.deactivated_cheaters.add(s)
+
+        for v in self.activation_queue:
+            (f, w) = self.activation_queue[v]
+            if frame >= f and v not in self.validators:
+                self.validator_weights[v] = w
+                self.validators.append(v)
+
+        weights_total = sum(
+            self.validator_weights[v]
+            for v in self.validators
+            if (v not in self.activation_queue or frame >= self.activation_queue[v][0])
+            and (v not in self.deactivated_cheaters)
+            and (v not in self.deactivated_validators)
+        )
+
+        self.quorum_cache[frame] = 2 * weights_total // 3 + 1
+        return self.quorum_cache[frame]
+
+
+def fresh_quorum(weights, activations, deactivations, frame, observers=()):
+    # a ledger that is given the final queues before any quorum is computed
+    lachesis = new_ledger(weights)
+    for observer, cheater, cheater_frame in observers:
+        lachesis.suspect_cheater(observer, cheater, cheater_frame)
+    for validator, (queued_frame, weight) in activations.items():
+        lachesis.queue_activation(validator, queued_frame, weight)
+    for validator, queued_frame in deactivations.items():
+        lachesis.queue_deactivation(validator, queued_frame)
+    return lachesis.quorum(frame)
+
+
+def check_late_deactivation():
+    # a deactivation queued for an earlier frame than one the ledger has already
+    # applied must not count the later one for the frames in between
+    weights = {v: 10 for v in "ABCD"}
+    lachesis = new_ledger(weights)
+    lachesis.queue_deactivation("D", 4)
+    for frame in range(1, 6):
+        lachesis.quorum(frame)
+    lachesis.queue_deactivation("C", 2)
+    quorums = [lachesis.quorum(frame) for frame in range(1, 6)]
+    expected = [
+        fresh_quorum(weights, {}, {"C": 2, "D": 4}, frame) for frame in range(1, 6)
+    ]
+    assert quorums == expected == [27, 21, 21, 14, 14], (quorums, expected)
+
+
+def random_observers(rng, validators, num_frames):
+    # a few cheaters, each observed by a random share of the validators
+    observers = []
+    for cheater in rng.sample(validators, 2):
+        for observer in validators:
+            if observer != cheater and rng.random() < 0.9:
+                observers.append(
+                    (observer, cheater, rng.randint(1, num_frames // 2))
+                )
+    return observers
+
+
+def check_churn(seed, num_validators=12, num_steps=200, num_frames=20):
+    rng = random.Random(seed)
+    weights = {f"V{i}": rng.randint(1, 20) for i in range(num_validators)}
+    joining = [f"J{i}" for i in range(num_validators // 2)]
+    observers = random_observers(rng, list(weights), num_frames)
+    lachesis = new_ledger(weights)
+    for observer, cheater, cheater_frame in observers:
+        lachesis.suspect_cheater(observer, cheater, cheater_frame)
+    activations = {}
+    deactivations = {}
+
+    for _ in range(num_steps):
+        action = rng.random()
+        if action < 0.15:
+            validator = rng.choice(list(weights))
+            deactivations[validator] = rng.randint(1, num_frames)
+            lachesis.queue_deactivation(validator, deactivations[validator])
+        elif action < 0.25 and joining:
+            validator = joining.pop()
+            activations[validator] = (rng.randint(1, num_frames), rng.randint(1, 20))
+            lachesis.queue_activation(validator, *activations[validator])
+        else:
+            frame = rng.randint(1, num_frames)
+            quorum = lachesis.quorum(frame)
+            expected = fresh_quorum(
+                weights, activations, deactivations, frame, observers
+            )
+            assert quorum == expected, (seed, frame, quorum, expected)
+
+
+def check_baseline(seed, num_validators=12, num_frames=30):
+    # quorums computed frame by frame, with queue changes and cheater observations
+    # arriving along the way, as they do while a DAG is processed
+    rng = random.Random(seed)
+    weights = {f"V{i}": rng.randint(1, 20) for i in range(num_validators)}
+    joining = [f"J{i}" for i in range(num_validators // 2)]
+    observers = random_observers(rng, list(weights), num_frames)
+    lachesis = new_ledger(weights)
+    baseline = BaselineLedger(weights)
+
+    for frame in range(1, num_frames + 1):
+        for observer, cheater, cheater_frame in observers:
+            if cheater_frame == frame:
+                lachesis.suspect_cheater(observer, cheater, cheater_frame)
+                baseline.suspected_cheaters.add(cheater)
+                baseline.validator_cheater_frames.setdefault(observer, {})[
+                    cheater
+                ] = cheater_frame
+        if rng.random() < 0.3:
+            validator = rng.choice(list(weights))
+            if validator not in lachesis.deactivation_queue:
+                deactivation_frame = frame + rng.randint(1, 3)
+                lachesis.queue_deactivation(validator, deactivation_frame)
+                baseline.deactivation_queue[validator] = deactivation_frame
+        if rng.random() < 0.2 and joining:
+            validator = joining.pop()
+            activation = (frame + rng.randint(1, 3), rng.randint(1, 20))
+            lachesis.queue_activation(validator, *activation)
+            baseline.activation_queue[validator] = activation
+
+        quorum = lachesis.quorum(frame)
+        expected = baseline.quorum(frame)
+        assert quorum == expected, (seed, frame, quorum, expected)
+
+
+def check_quorum_ledger(num_seeds=200):
+    check_late_deactivation()
+    for seed in range(num_seeds):
+        check_churn(seed)
+        check_baseline(seed)
+    return num_seeds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the quorum ledger against a fresh ledger and the "
+        "original quorum computation"
+    )
+    parser.add_argument(
+        "--seeds",
+        type=int,
+        default=200,
+        help="Number of random churn sequences to check",
+    )
+    args = parser.parse_args()
+    num_seeds = check_quorum_ledger(args.seeds)
+    print(
+        f"quorum ledger matches a fresh ledger and the original quorums over "
+        f"{num_seeds} churn sequences"
+    )
@@ -0,0 +1,370 @@
+import argparse
+import os
+import sys
+import numpy as np
+from graph import logistic
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "PyLachesis")
+)
+from dag_format import write_binary_columns
+
+BINARY_EXTENSION = ".ldag"
+
+# random draws are made a block of levels at a time, so that memory stays bounded
+# by the size of a block rather than by the size of the DAG
+block_draws = 2**22
+
+
+def level_blocks(num_levels, per_level, start=0):
+    step = max(1, block_draws // max(1, per_level))
+    for first in range(start, num_levels, step):
+        yield first, min(first + step, num_levels)
+
+
+def validator_names(num_nodes):
+    # the letters of graph.py as long as there are enough of them
+    if num_nodes <= 26:
+        return [chr(j + 65) for j in range(num_nodes)]
+    return [f"V{j}" for j in range(num_nodes)]
+
+
+def random_neighbors(rng, num_nodes, neighbor_probability):
+    upper = np.triu(rng.random((num_nodes, num_nodes)) < neighbor_probability, 1)
+    neighbors = upper | upper.T
+
+    # every validator gets at least one neighbor, preferably another one without
+    for node in range(num_nodes):
+        if num_nodes < 2 or neighbors[node].any():
+            continue
+        unconnected = np.flatnonzero(~neighbors.any(axis=1))
+        unconnected = unconnected[unconnected != node]
+        if not len(unconnected):
+            unconnected = np.delete(np.arange(num_nodes), node)
+        other = rng.choice(unconnected)
+        neighbors[node, other] = neighbors[other, node] = True
+
+    return neighbors
+
+
+def generate_events(
+    rng,
+    cheater_probability,
+    num_levels,
+    num_nodes,
+    node_present_probability,
+    observing_probability,
+    neighbor_probability,
+):
+    weights = (
+        logistic(40, 0.2, 25, num_nodes) * rng.random(num_nodes)
+    ).astype(np.int64) + 1
+    neighbors = random_neighbors(rng, num_nodes, neighbor_probability)
+
+    start_times = np.where(
+        rng.random(num_nodes) < 0.1, rng.integers(0, num_levels + 1, num_nodes), 0
+    )
+    stop_times = np.where(
+        rng.random(num_nodes) < 0.1,
+        rng.integers(0, num_levels + 1, num_nodes),
+        num_levels - 1,
+    )
+    start_times, stop_times = (
+        np.minimum(start_times, stop_times),
+        np.maximum(start_times, stop_times),
+    )
+
+    drawn = np.empty((num_levels, num_nodes), dtype=bool)
+    for first, last in level_blocks(num_levels, num_nodes):
+        drawn[first:last] = (
+            rng.random((last - first, num_nodes), dtype=np.float32)
+            < node_present_probability
+        )
+    levels = np.arange(num_levels)[:, None]
+    present = (
+        (drawn | (levels == stop_times))
+        & (levels >= start_times)
+        & (levels <= stop_times)
+    )
+
+    # the first event of a validator that starts late forks the chain of a
+    # validator present one level before it with cheater_probability: it takes
+    # on that validator's name, weight, stop time and next sequences, and so
+    # does the rest of its row
+    has_events = present.any(axis=0)
+    first_levels = np.where(has_events, present.argmax(axis=0), -1)
+    cheats = rng.random(num_nodes) < cheater_probability
+    cheat_targets = np.full(num_nodes, -1)
+    sequence_offsets = np.zeros(num_nodes, dtype=np.int64)
+    deepest = np.arange(num_nodes)
+
+    for node in sorted(
+        np.flatnonzero(cheats & (first_levels > 0)), key=lambda n: first_levels[n]
+    ):
+        level = first_levels[node]
+        candidates = np.flatnonzero(present[level - 1])
+        candidates = candidates[candidates != node]
+        if not len(candidates):
+            continue
+        target = rng.choice(candidates)
+        cheat_targets[node] = target
+        stop_times[node] = stop_times[target]
+        later = levels[level + 1 :, 0]
+        present[level + 1 :, node] = (
+            drawn[level + 1 :, node] | (later == stop_times[node])
+        ) & (later <= stop_times[node])
+        sequence_offsets[node] = (
+            present[:level, target].sum() + sequence_offsets[target]
+        )
+        deepest[node] = deepest[target]
+
+    # events are numbered level by level, so the key level * num_nodes + row of
+    # the events is sorted and locates an event with a binary search
+    event_levels, event_rows = np.nonzero(present)
+    event_keys = event_levels * num_nodes + event_rows
+    num_events = len(event_keys)
+
+    by_row = np.lexsort((event_levels, event_rows))
+    row_starts = np.r_[True, event_rows[by_row][1:] != event_rows[by_row][:-1]]
+    group_starts = np.maximum.accumulate(np.where(row_starts, np.arange(num_events), 0))
+    positions = np.empty(num_events, dtype=np.int64)
+    positions[by_row] = np.arange(num_events) - group_starts
+
+    # self-parents, then the forked parent of the first event of a cheater, then
+    # the observed events of neighbors one level before
+    children = [by_row[1:][~row_starts[1:]]]
+    parents = [by_row[:-1][~row_starts[1:]]]
+    ranks = [np.zeros(len(children[0]), dtype=np.int8)]
+
+    forked = np.flatnonzero(cheat_targets >= 0)
+    children.append(
+        np.searchsorted(event_keys, first_levels[forked] * num_nodes + forked)
+    )
+    parents.append(
+        np.searchsorted(
+            event_keys,
+            (first_levels[forked] - 1) * num_nodes + cheat_targets[forked],
+        )
+    )
+    ranks.append(np.ones(len(forked), dtype=np.int8))
+
+    forking = np.zeros((num_levels, num_nodes), dtype=bool)
+    forking[first_levels[forked], forked] = True
+    for first, last in level_blocks(num_levels, num_nodes * num_nodes, start=1):
+        # the (level, observer, observed) cells drawn with observing_probability
+        # are sampled directly, as a binomial number of distinct cells, which
+        # only costs as much as the cells drawn
+        shape = (last - first, num_nodes, num_nodes)
+        num_cells = shape[0] * shape[1] * shape[2]
+        cells = rng.choice(
+            num_cells, rng.binomial(num_cells, observing_probability), replace=False
+        )
+        block_levels, block_rows, block_parents = np.unravel_index(
+            np.sort(cells), shape
+        )
+        block_levels += first
+        observed = (
+            neighbors[block_rows, block_parents]
+            & present[block_levels, block_rows]
+            & ~forking[block_levels, block_rows]
+            & present[block_levels - 1, block_parents]
+        )
+        block_levels = block_levels[observed]
+        block_rows = block_rows[observed]
+        block_parents = block_parents[observed]
+        children.append(
+            np.searchsorted(event_keys, block_levels * num_nodes + block_rows)
+        )
+        parents.append(
+            np.searchsorted(event_keys, (block_levels - 1) * num_nodes + block_parents)
+        )
+        ranks.append(np.full(len(block_levels), 2, dtype=np.int8))
+
+    children = np.concatenate(children)
+    parents = np.concatenate(parents)
+    order = np.lexsort((np.concatenate(ranks), children))
+    parent_offsets = np.zeros(num_events + 1, dtype=np.int64)
+    parent_offsets[1:] = np.cumsum(np.bincount(children, minlength=num_events))
+
+    # random version 4 UUIDs, drawn from the seeded generator as well
+    uuids = np.frombuffer(bytearray(rng.bytes(16 * num_events)), dtype=np.uint8)
+    uuids = uuids.reshape(num_events, 16)
+    uuids[:, 6] = uuids[:, 6] & 0x0F | 0x40
+    uuids[:, 8] = uuids[:, 8] & 0x3F | 0x80
+
+    return {
+        "validators": validator_names(num_nodes),
+        "neighbors": neighbors,
+        "validator": deepest[event_rows],
+        "timestamp": event_levels + 1,
+        "sequence": positions + sequence_offsets[event_rows] + 1,
+        "weight": weights[deepest[event_rows]],
+        "last_event": event_levels == stop_times[event_rows],
+        "uuid": uuids,
+        "parent_offsets": parent_offsets,
+        "parent_indices": parents[order],
+    }
+
+
+def uuid_strings(uuids):
+    hex_digits = uuids.tobytes().hex()
+    return [
+        f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:32]}"
+        for h in (hex_digits[i : i + 32] for i in range(0, len(hex_digits), 32))
+    ]
+
+
+def write_text(dag, output_filename):
+    validators = dag["validators"]
+    names = [validators[v] for v in dag["validator"].tolist()]
+    timestamps = dag["timestamp"].tolist()
+    sequences = dag["sequence"].tolist()
+    weights = dag["weight"].tolist()
+    last_events = dag["last_event"].tolist()
+    uuids = uuid_strings(dag["uuid"])
+    parent_offsets = dag["parent_offsets"].tolist()
+    parent_indices = dag["parent_indices"].tolist()
+
+    # the line format of graph.py, where the parents are listed as children
+    child_labels = [
+        f" child_unique_id: {uuids[i]} child_label: "
+        f"({names[i]},{timestamps[i]},{sequences[i]});"
+        for i in range(len(uuids))
+    ]
+    with open(output_filename, "w") as f:
+        for first in range(0, len(uuids), 65536):
+            lines = []
+            for i in range(first, min(first + 65536, len(uuids))):
+                lines.append(
+                    f"unique_id: {uuids[i]} label: ({names[i]},{timestamps[i]},"
+                    f"{sequences[i]},{weights[i]},{last_events[i]});"
+                )
+                lines.extend(
+                    child_labels[p]
+                    for p in parent_indices[parent_offsets[i] : parent_offsets[i + 1]]
+                )
+                lines.append("\n")
+            f.write("".join(lines))
+
+
+def write_binary(dag, output_filename):
+    # validators are numbered in order of appearance, as write_binary_dag does
+    appearing, first_events = np.unique(dag["validator"], return_index=True)
+    appearing = appearing[np.argsort(first_events)]
+    validator_ids = np.zeros(len(dag["validators"]), dtype=np.int64)
+    validator_ids[appearing] = np.arange(len(appearing))
+
+    write_binary_columns(
+        output_filename,
+        [dag["validators"][v] for v in appearing],
+        validator_ids[dag["validator"]],
+        dag["timestamp"],
+        dag["sequence"],
+        dag["weight"],
+        dag["last_event"],
+        dag["uuid"].tobytes(),
+        dag["parent_offsets"],
+        dag["parent_indices"],
+    )
+
+
+def write_neighbors(dag, neighbor_filename):
+    validators = dag["validators"]
+    with open(neighbor_filename, "w") as f:
+        for node, row in enumerate(dag["neighbors"]):
+            f.write(
+                f"{validators[node]}: "
+                f"{', '.join(validators[other] for other in np.flatnonzero(row))}\n"
+            )
+
+
+def generate_dag(
+    output_filename,
+    num_levels,
+    num_nodes,
+    cheater_probability=0.2,
+    node_present_probability=0.65,
+    observing_probability=0.3,
+    neighbor_probability=0.5,
+    seed=None,
+    neighbor_filename=None,
+):
+    rng = np.random.default_rng(seed)
+    dag = generate_events(
+        rng,
+        cheater_probability,
+        num_levels,
+        num_nodes,
+        node_present_probability,
+        observing_probability,
+        neighbor_probability,
+    )
+
+    if output_filename.endswith(BINARY_EXTENSION):
+        write_binary(dag, output_filename)
+    else:
+        write_text(dag, output_filename)
+    if neighbor_filename is not None:
+        write_neighbors(dag, neighbor_filename)
+
+    return len(dag["timestamp"]), len(dag["parent_indices"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a large random DAG without plotting it"
+    )
+    parser.add_argument(
+        "output_file",
+        help=f"the DAG file, in the binary format if it ends in {BINARY_EXTENSION}",
+    )
+    parser.add_argument("--levels", type=int, default=10, help="levels/time steps")
+    parser.add_argument(
+        "--validators", type=int, default=5, help="validator event nodes in each level"
+    )
+    parser.add_argument(
+        "--cheaters",
+        type=float,
+        default=0.2,
+        help="probability that a random validator is a cheater",
+    )
+    parser.add_argument(
+        "--present",
+        type=float,
+        default=0.65,
+        help="probability that an event node is present",
+    )
+    parser.add_argument(
+        "--observing",
+        type=float,
+        default=0.3,
+        help="probability that an event node observes a neighbor's event node",
+    )
+    parser.add_argument(
+        "--neighbors",
+        type=float,
+        default=0.5,
+        help="probability that any two given validators are neighbors",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=None, help="seed for a reproducible DAG"
+    )
+    parser.add_argument(
+        "--neighbor-file",
+        default=None,
+        help="also write the neighbors of each validator to this file",
+    )
+    args = parser.parse_args()
+
+    num_events, num_edges = generate_dag(
+        args.output_file,
+        args.levels,
+        args.validators,
+        args.cheaters,
+        args.present,
+        args.observing,
+        args.neighbors,
+        args.seed,
+        args.neighbor_file,
+    )
+    print(f"wrote {num_events} events and {num_edges} edges to {args.output_file}")
@@ -4,16 +4,24 @@ import matplotlib.pyplot as plt
 import random
 import matplotlib
 import math
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 matplotlib.use("Agg")
 
+manifest_filename = "manifest.json"
+
 
 def logistic(L, k, x0, x):
     return L / (1 + math.exp(-k * (x - x0)))
 
 
-def random_weight(x):
-    return int(logistic(40, 0.2, 25, x) * random.random()) + 1
+def random_weight(x, rng=random):
+    return int(logistic(40, 0.2, 25, x) * rng.random()) + 1
 
 
 def createGraph(
@@ -30,17 +38,21 @@ def createGraph(
     txt_filename_format_one="txt.txt",
     txt_filename_format_two="txt2.txt",
     neighbor_filename="neighbors.txt",
+    rng=random,
 ):
+    # Every random choice is drawn from rng, so a seeded random.Random instance
+    # reproduces the same files, UUIDs included
+
     # Initialize the graph
     G = nx.DiGraph()
 
-    weights = [random_weight(num_nodes) for j in range(num_nodes)]
+    weights = [random_weight(num_nodes, rng) for j in range(num_nodes)]
 
     # Create the neighbors dictionary
     neighbors = {}
     for i in range(num_nodes):
         for j in range(i + 1, num_nodes):
-            if random.random() < neighbor_probability:
+            if rng.random() < neighbor_probability:
                 if i not in neighbors:
                     neighbors[i] = set()
                 if j not in neighbors:
@@ -51,7 +63,7 @@ def createGraph(
     # Ensure each node has at least one neighbor
     unconnected_nodes = set(range(num_nodes))
     while unconnected_nodes:
-        node1 = random.choice(list(unconnected_nodes))
+        node1 = rng.choice(list(unconnected_nodes))
         unconnected_nodes.remove(node1)
         if node1 not in neighbors:
             neighbors[node1] = set()
@@ -64,7 +76,7 @@ def createGraph(
                     .difference({node1})
                     .difference(neighbors[node1])
                 )
-            node2 = random.choice(list(available_nodes))
+            node2 = rng.choice(list(available_nodes))
 
             if node2 not in neighbors:
                 neighbors[node2] = set()
@@ -99,11 +111,11 @@ def createGraph(
     cheater_nodes = {}
 
     start_times = [
-        random.randint(0, num_levels) if random.random() < 0.1 else 0
+        rng.randint(0, num_levels) if rng.random() < 0.1 else 0
         for _ in range(num_nodes)
     ]
     stop_times = [
-        random.randint(0, num_levels) if random.random() < 0.1 else num_levels - 1
+        rng.randint(0, num_levels) if rng.random() < 0.1 else num_levels - 1
         for _ in range(num_nodes)
     ]
 
@@ -111,6 +123,7 @@ def createGraph(
         if start_times[j] > stop_times[j]:
             start_times[j], stop_times[j] = stop_times[j], start_times[j]
 
+    started_rows = set()
     for i in range(num_levels):
         for j in range(num_nodes):
             if i < start_times[j] or i > stop_times[j]:
@@ -118,7 +131,7 @@ def createGraph(
 
             if (
                 i == stop_times[j] and i <= num_levels - 1
-            ) or random.random() < node_present_probability:
+            ) or rng.random() < node_present_probability:
                 node = (i, j)
                 G.add_node(node)
                 if i == 0:
@@ -141,9 +154,11 @@ def createGraph(
                 if node not in color_map:
                     color_map[node] = colors[j % len(colors)]
                     parent_count[node] = 0
-                if not any(n[1] == j and n[0] < i for n in G.nodes):
-                    if random.random() < cheater_probability:
-                        for k in random.sample(range(num_nodes), num_nodes):
+                # only the first node of a row can fork another validator's row
+                if j not in started_rows:
+                    started_rows.add(j)
+                    if rng.random() < cheater_probability:
+                        for k in rng.sample(range(num_nodes), num_nodes):
                             if k != j and (i - 1, k) in G.nodes:
                                 cheater_nodes[node] = (i - 1, k)
                                 stop_times[j] = stop_times[k]
@@ -164,7 +179,7 @@ def createGraph(
                         self_ref = True
                     parent = (parent[0] - 1, parent[1])
                 for k in range(num_nodes):
-                    if random.random() < observing_probability:
+                    if rng.random() < observing_probability:
                         target = (i - 1, k)
                         if target in G.nodes and target[1] in neighbors.get(
                             node[1], set()
@@ -218,74 +233,76 @@ def createGraph(
                 cheating_parents += 1
                 color_map[(i, j)] = color_map[(deepest_cheater)]
 
-    # Plot the figure
-    figsize = [20, 10]
-    # Scale the figure size proportionally to the number of levels and nodes
-    if num_levels >= 15:
-        figsize[0] = figsize[0] * num_levels / 20
-    if num_nodes >= 10:
-        figsize[0] = figsize[0] * num_nodes / 4
-        figsize[1] = figsize[1] * num_nodes / 10
-    fig = plt.figure(figsize=(figsize[0], figsize[1]))
-    pos = {(i, j): (i, j) for i in range(num_levels) for j in range(num_nodes)}
-    nx.draw(
-        G,
-        pos,
-        with_labels=True,
-        labels={
-            val: r"$\mathrm{{{}}}_{{{},{},{}}}$".format(
-                labels[val][0], labels[val][1], labels[val][2], labels[val][3]
-            )
-            for val in labels
-        },
-        font_family="serif",
-        font_size=9,
-        node_color=[color_map.get(node, color_map[node]) for node in G.nodes()],
-        node_size=1300,
-        font_weight="bold",
-    )
-
-    if annotate:
-        plt.text(
-            0.007,
-            0.98,
-            "node_present_probability: {}".format(node_present_probability),
-            fontsize=8,
-            fontname="monospace",
-            transform=fig.transFigure,
-        )
-        plt.text(
-            0.007,
-            0.96,
-            "observing_probability: {}".format(observing_probability),
-            fontsize=8,
-            fontname="monospace",
-            transform=fig.transFigure,
-        )
-        plt.text(
-            0.007,
-            0.94,
-            "num_nodes: {}".format(num_nodes),
-            fontsize=8,
-            fontname="monospace",
-            transform=fig.transFigure,
-        )
-        plt.text(
-            0.007,
-            0.92,
-            "num_levels: {}".format(num_levels),
-            fontsize=8,
-            fontname="monospace",
-            transform=fig.transFigure,
-        )
-        plt.text(
-            0.007,
-            0.90,
-            "cheat_prob: {}".format(cheater_probability),
-            fontsize=8,
-            fontname="monospace",
-            transform=fig.transFigure,
+    # Plot the figure, unless only the text files are needed
+    plot = save_plot or show_graph
+    if plot:
+        figsize = [20, 10]
+        # Scale the figure size proportionally to the number of levels and nodes
+        if num_levels >= 15:
+            figsize[0] = figsize[0] * num_levels / 20
+        if num_nodes >= 10:
+            figsize[0] = figsize[0] * num_nodes / 4
+            figsize[1] = figsize[1] * num_nodes / 10
+        fig = plt.figure(figsize=(figsize[0], figsize[1]))
+        pos = {(i, j): (i, j) for i in range(num_levels) for j in range(num_nodes)}
+        nx.draw(
+            G,
+            pos,
+            with_labels=True,
+            labels={
+                val: r"$\mathrm{{{}}}_{{{},{},{}}}$".format(
+                    labels[val][0], labels[val][1], labels[val][2], labels[val][3]
+                )
+                for val in labels
+            },
+            font_family="serif",
+            font_size=9,
+            node_color=[color_map.get(node, color_map[node]) for node in G.nodes()],
+            node_size=1300,
+            font_weight="bold",
         )
+
+        if annotate:
+            plt.text(
+                0.007,
+                0.98,
+                "node_present_probability: {}".format(node_present_probability),
+                fontsize=8,
+                fontname="monospace",
+                transform=fig.transFigure,
+            )
+            plt.text(
+                0.007,
+                0.96,
+                "observing_probability: {}".format(observing_probability),
+                fontsize=8,
+                fontname="monospace",
+                transform=fig.transFigure,
+            )
+            plt.text(
+                0.007,
+                0.94,
+                "num_nodes: {}".format(num_nodes),
+                fontsize=8,
+                fontname="monospace",
+                transform=fig.transFigure,
+            )
+            plt.text(
+                0.007,
+                0.92,
+                "num_levels: {}".format(num_levels),
+                fontsize=8,
+                fontname="monospace",
+                transform=fig.transFigure,
+            )
+            plt.text(
+                0.007,
+                0.90,
+                "cheat_prob: {}".format(cheater_probability),
+                fontsize=8,
+                fontname="monospace",
+                transform=fig.transFigure,
+            )
     # print(cheater_nodes)
 
     # Save graph as text data in format one
@@ -294,7 +311,7 @@ def createGraph(
     with open(txt_filename_format_one, "w") as f:
         for node in G:
             if node not in node_uuids:
-                node_uuids[node] = uuid.uuid4()
+                node_uuids[node] = uuid.UUID(int=rng.getrandbits(128), version=4)
             node_uuid = node_uuids[node]
             f.write(
                 "unique_id: "
@@ -314,7 +331,7 @@ def createGraph(
             f.write(";")
             for child in G[node]:
                 if child not in node_uuids:
-                    node_uuids[child] = uuid.uuid4()
+                    node_uuids[child] = uuid.UUID(int=rng.getrandbits(128), version=4)
                 child_uuid = node_uuids[child]
                 f.write(
                     " child_unique_id: "
@@ -359,7 +376,8 @@ def createGraph(
         fig.savefig(graph_filename, format="pdf", dpi=300, bbox_inches="tight")
     if show_graph:
         plt.show()
-    plt.close()
+    if plot:
+        plt.close()
 
 
 def generate_graphs(
@@ -373,6 +391,10 @@ def generate_graphs(
     neighbor_prob_input,
     base_dir,
     starting_index,
+    seed=None,
+    workers=1,
+    plot=True,
+    progress=None,
 ):
     annotate = True if annotate_graph.lower() == "y" else False
     num_graphs = int(num_graphs) if num_graphs else 50
@@ -408,47 +430,145 @@ def generate_graphs(
         else None
     )
 
+    if seed is None:
+        # an unseeded run still records the seed it drew, so that it can be repeated
+        seed = random.SystemRandom().getrandbits(63)
+
+    entries = {}
     for i in range(num_graphs):
-        num_levels = random.randint(5, 100) if level_input is None else level_input
-        num_nodes = random.randint(3, 25) if node_input is None else node_input
+        graph_index = str(int(starting_index) + (i))
+        rng = random.Random(graph_seed(seed, base_dir, graph_index))
+        num_levels = rng.randint(5, 100) if level_input is None else level_input
+        num_nodes = rng.randint(3, 25) if node_input is None else node_input
         node_present_probability = (
-            random.uniform(0.5, 0.7)
-            if present_prob_input is None
-            else present_prob_input
+            rng.uniform(0.5, 0.7) if present_prob_input is None else present_prob_input
         )
         observing_probability = (
-            random.uniform(0.2, 0.4)
-            if observe_prob_input is None
-            else observe_prob_input
+            rng.uniform(0.2, 0.4) if observe_prob_input is None else observe_prob_input
         )
         neighbor_probability = (
-            random.uniform(0.1, 0.9)
+            rng.uniform(0.1, 0.9)
             if neighbor_prob_input is None
             else neighbor_prob_input
         )
 
-        graph_index = str(int(starting_index) + (i))
+        entries[f"graph_{graph_index}"] = {
+            "graph_index": graph_index,
+            "base_seed": seed,
+            "seed": rng.getrandbits(63),
+            "cheater_probability": cheater_input,
+            "num_levels": num_levels,
+            "num_nodes": num_nodes,
+            "node_present_probability": node_present_probability,
+            "observing_probability": observing_probability,
+            "neighbor_probability": neighbor_probability,
+            "annotate": annotate,
+            "plot": plot,
+        }
+
+    os.makedirs(base_dir, exist_ok=True)
+    results = map_graphs(list(entries.values()), base_dir, plot, workers, progress)
+    for entry in results:
+        entries[f"graph_{entry['graph_index']}"] = entry
+
+    manifest = read_manifest(base_dir)
+    manifest.update(entries)
+    with open(os.path.join(base_dir, manifest_filename), "w") as file:
+        json.dump(dict(sorted(manifest.items(), key=manifest_order)), file, indent=2)
+
+    return seed
+
+
+def graph_seed(seed, base_dir, graph_index):
+    # the seed of a graph only depends on the base seed, the name of its directory
+    # and its index, not on the graphs generated before it or on the worker
+    key = f"{seed}:{os.path.basename(os.path.normpath(base_dir))}:{graph_index}"
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big")
+
+
+def file_hash(filename):
+    with open(filename, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def generate_graph(entry, base_dir, plot=True):
+    graph_index = entry["graph_index"]
+    txt_filename_format_one = f"{base_dir}/graph_{graph_index}.txt"
+    neighbor_filename = f"{base_dir}/neighbors_{graph_index}.txt"
+    createGraph(
+        entry["cheater_probability"],
+        entry["num_levels"],
+        entry["num_nodes"],
+        entry["node_present_probability"],
+        entry["observing_probability"],
+        entry["neighbor_probability"],
+        entry["annotate"],
+        show_graph=False,
+        save_plot=plot,
+        graph_filename=f"{base_dir}/graph_{graph_index}.pdf",
+        txt_filename_format_one=txt_filename_format_one,
+        txt_filename_format_two=f"{base_dir}/events_{graph_index}.txt",
+        neighbor_filename=neighbor_filename,
+        rng=random.Random(entry["seed"]),
+    )
+    return dict(
+        entry,
+        sha256=file_hash(txt_filename_format_one),
+        neighbors_sha256=file_hash(neighbor_filename),
+    )
 
-        graph_filename = f"{base_dir}/graph_{graph_index}.pdf"
-        txt_filename_format_one = f"{base_dir}/graph_{graph_index}.txt"
-        txt_filename_format_two = f"{base_dir}/events_{graph_index}.txt"
-        neighbor_filename = f"{base_dir}/neighbors_{graph_index}.txt"
-        createGraph(
-            cheater_input,
-            num_levels,
-            num_nodes,
-            node_present_probability,
-            observing_probability,
-            neighbor_probability,
-            annotate,
-            show_graph=False,
-            save_plot=True,
-            graph_filename=graph_filename,
-            txt_filename_format_one=txt_filename_format_one,
-            txt_filename_format_two=txt_filename_format_two,
-            neighbor_filename=neighbor_filename,
-        )
 
+def map_graphs(entries, base_dir, plot, workers=1, progress=None):
+    if workers <= 1:
+        results = (generate_graph(entry, base_dir, plot) for entry in entries)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(
+            generate_graph,
+            entries,
+            itertools.repeat(base_dir),
+            itertools.repeat(plot),
+        )
+    try:
+        generated = []
+        for entry in results:
+            generated.append(entry)
+            if progress is not None:
+                progress.update(1)
+        return generated
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def manifest_order(item):
+    return int(item[1]["graph_index"])
+
+
+def read_manifest(base_dir):
+    manifest_path = os.path.join(base_dir, manifest_filename)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as file:
+        return json.load(file)
+
+
+def verify_graphs(base_dir, workers=1, progress=None):
+    # regenerates the text files of every graph in the manifest from its recorded
+    # seed and parameters, and returns the graphs whose files differ
+    manifest = read_manifest(base_dir)
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = map_graphs(list(manifest.values()), work_dir, False, workers, progress)
+    mismatches = []
+    for entry in results:
+        recorded = manifest[f"graph_{entry['graph_index']}"]
+        if (entry["sha256"], entry["neighbors_sha256"]) != (
+            recorded["sha256"],
+            recorded["neighbors_sha256"],
+        ):
+            mismatches.append(f"graph_{entry['graph_index']}")
+    return mismatches
 
 if __name__ == "__main__":
     # Collect input from the user
@@ -478,6 +598,7 @@ if __name__ == "__main__":
     starting_index = input(
         "Enter the starting index for file numbering: (Default is 1) "
     )
+    seed = input("Enter the seed of the graphs: (Default is random) ")
 
     base_dir = "." if not base_dir or base_dir == "" else base_dir
 
@@ -485,7 +606,7 @@ if __name__ == "__main__":
         int(starting_index) if starting_index and starting_index != "" else 1
     )
 
-    generate_graphs(
+    seed = generate_graphs(
         annotate_graph,
         num_graphs,
         cheater_input,
@@ -496,4 +617,6 @@ if __name__ == "__main__":
         neighbor_prob_input,
         base_dir,
         starting_index,
+        int(seed) if seed else None,
     )
+    print(f"seed: {seed}")